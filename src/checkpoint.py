@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, List, Set
+
+KEY_CHECKPOINT = 'checkpoint'
+
+
+class RunCheckpoint:
+    """
+    Tracks progress of the run so a run stopped by the deadline can be resumed by the next run with the same plan.
+
+    The checkpoint is stored under the `checkpoint` key of the state dictionary, other keys are preserved.
+    Progress is tracked per destination database. The state is written once at the end of the run,
+    as Keboola keeps the state of successful jobs only.
+    """
+
+    def __init__(self, state: dict, plan_hash: str, write_state: Callable[[dict], None]):
+        self._state = state
+        self._plan_hash = plan_hash
+        self._write_state = write_state
+
+        self.completed_buckets: Set[str] = set()
+        self.completed_tables: Set[str] = set()
+        # destination/table_id => [destination, bucket_id]
+        self.failed_tables: Dict[str, List[str]] = {}
+        # number of views created in this run
+        self.created_views = 0
+
+        checkpoint = state.get(KEY_CHECKPOINT) or {}
+        if checkpoint.get('plan_hash') == plan_hash:
+            self.completed_buckets = set(checkpoint.get('completed_buckets', []))
+            self.completed_tables = set(checkpoint.get('completed_tables', []))
+            self.failed_tables = checkpoint.get('failed_tables', {})
+            logging.info(f'Resuming from checkpoint: {len(self.completed_buckets)} buckets and '
+                         f'{len(self.completed_tables)} tables already processed, '
+                         f'{len(self.failed_tables)} failed tables will be retried.')
+        elif checkpoint:
+            logging.info('The configuration changed since the last checkpoint, starting from the beginning.')
+
+    @staticmethod
+    def build_plan_hash(plan: dict) -> str:
+        return hashlib.sha256(json.dumps(plan, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _key(destination: str, object_id: str) -> str:
+        return f'{destination}/{object_id}'
+
+    def is_bucket_done(self, destination: str, bucket_id: str) -> bool:
+        return self._key(destination, bucket_id) in self.completed_buckets
+
+    def is_table_done(self, destination: str, table_id: str) -> bool:
+        return self._key(destination, table_id) in self.completed_tables
+
+    def mark_table_done(self, destination: str, table_id: str):
+        key = self._key(destination, table_id)
+        self.completed_tables.add(key)
+        self.failed_tables.pop(key, None)
+        self.created_views += 1
+
+    def mark_table_failed(self, destination: str, table_id: str, bucket_id: str):
+        self.failed_tables[self._key(destination, table_id)] = [destination, bucket_id]
+
+    def get_failed_buckets(self) -> List[tuple]:
+        """
+        Returns: Sorted unique (destination, bucket_id) pairs containing failed tables
+        """
+        return sorted({tuple(f) for f in self.failed_tables.values()})
+
+    def mark_bucket_done(self, destination: str, bucket_id: str):
+        if [destination, bucket_id] in self.failed_tables.values():
+            return
+        key = self._key(destination, bucket_id)
+        self.completed_buckets.add(key)
+        # tables of completed buckets are covered by the bucket
+        self.completed_tables = {t for t in self.completed_tables if not t.startswith(f'{key}.')}
+
+    def save(self):
+        self._state[KEY_CHECKPOINT] = {
+            'plan_hash': self._plan_hash,
+            'completed_buckets': sorted(self.completed_buckets),
+            'completed_tables': sorted(self.completed_tables),
+            'failed_tables': self.failed_tables
+        }
+        self._write_state(self._state)
+
+    def clear(self):
+        """
+        Removes the checkpoint after a run that processed all tables, the next run starts from the beginning.
+        """
+        self._state.pop(KEY_CHECKPOINT, None)
+        self._write_state(self._state)
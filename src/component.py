@@ -3,7 +3,10 @@ Template Component main class.
 
 """
 
+import dataclasses
 import logging
+import time
+from datetime import datetime, timezone
 
 import snowflake.connector.errors as snowflake_errors
 from kbcstorage.client import Client
@@ -15,8 +18,12 @@ from keboola.component.exceptions import UserException
 from keboola.component.sync_actions import SelectElement
 
 import configuration
+from checkpoint import RunCheckpoint
 from dbstorage import snowflake_client
 from dbstorage.snowflake_client import Credentials
+from name_filter import NameFilter
+from sapistorage.response_cache import MetadataResponseCache, KEY_METADATA_CACHE
+from scheduler import RunScheduler
 from view_creator import ViewCreator
 
 KEY_API_TOKEN = "#api_token"
@@ -65,20 +72,13 @@ class Component(ComponentBase):
         # check for missing configuration parameters
 
         self._init_configuration()
+        run_start = datetime.now(timezone.utc)
+        run_clock_start = time.monotonic()
 
         # config token support
         storage_token = self._get_storage_token()
         view_creator = ViewCreator(
-            Credentials(
-                account=self._configuration.account,
-                user=self._configuration.username,
-                password=self._configuration.pswd_password,
-                private_key=self._configuration.pswd_private_key,
-                private_key_pass=self._configuration.pswd_private_key_pass,
-                warehouse=self._configuration.warehouse,
-                role=self._configuration.role,
-                auth_type=self._configuration.auth_type,
-            ),
+            self._get_credentials(),
             self._get_kbc_root_url(),
             storage_token,
             self.environment_variables.project_id,
@@ -98,31 +98,273 @@ class Component(ComponentBase):
         # validate schema mapping
         self._configuration.validate_schema_mapping(bucket_ids)
         schema_mapping = self._configuration.schema_mapping
+        self._configuration.validate_materialization_rules()
+        destinations = self._configuration.get_destinations()
+        self._validate_warehouse_free(additional_options)
+
+        state = self.get_state_file()
+        if additional_options.async_metadata_fetch:
+            self._prefetch_bucket_metadata(
+                view_creator, bucket_ids, state, additional_options
+            )
+
+        for destination in destinations:
+            view_creator.validate_schema_names(
+                bucket_ids,
+                destination.use_bucket_alias,
+                destination.drop_stage_prefix,
+                schema_mapping,
+            )
 
-        view_creator.validate_schema_names(
+        checkpoint = RunCheckpoint(
+            state,
+            self._build_plan_hash(bucket_ids),
+            self.write_state_file,
+        )
+        scheduler = RunScheduler(
+            additional_options.deadline_minutes * 60, run_clock_start
+        )
+        ordered_bucket_ids = RunScheduler.order_buckets(
             bucket_ids,
-            additional_options.use_bucket_alias,
-            additional_options.drop_stage_prefix,
-            schema_mapping,
+            view_creator.get_bucket_details(bucket_ids),
+            additional_options.priority_bucket_ids,
+            [bucket_id for _, bucket_id in checkpoint.get_failed_buckets()],
+        )
+        view_options = dict(
+            session_id=self.environment_variables.run_id,
+            skip_shared_tables=additional_options.ignore_shared_tables,
+            schema_mapping=schema_mapping,
+            tag_tables=additional_options.query_timing_report,
+            materialization_rules=self._configuration.materialization_rules,
+            projection_mode=additional_options.projection_mode,
+            table_filter=NameFilter(
+                additional_options.include_tables, additional_options.exclude_tables
+            ),
+            column_filter=NameFilter(
+                additional_options.include_columns, additional_options.exclude_columns
+            ),
+        )
+
+        try:
+            # metadata are resolved once, views are applied to all destinations sharing the session
+            for credentials, destination_group in self._group_by_credentials(
+                destinations
+            ):
+                with view_creator.shared_session(credentials):
+                    for bucket_id in ordered_bucket_ids:
+                        for destination in destination_group:
+                            self._create_views(
+                                view_creator,
+                                checkpoint,
+                                scheduler,
+                                bucket_id,
+                                destination,
+                                view_options,
+                            )
+
+            self._retry_failed_tables(
+                view_creator, checkpoint, scheduler, destinations, view_options
+            )
+        finally:
+            view_creator.log_warehouse_free_summary()
+
+        if additional_options.query_timing_report and not self._configuration.warehouse_free:
+            self._report_query_timing(
+                view_creator,
+                destinations[0].database,
+                run_start,
+                additional_options.query_timing_report_limit,
+            )
+
+        # the state is kept only if the job succeeds, it is written once at the end of the run
+        failed_tables = sorted(checkpoint.failed_tables)
+        if failed_tables and (not scheduler.deferred or not checkpoint.created_views):
+            raise UserException(
+                f"Failed to create views for tables: {failed_tables}. See the warnings in the log for details."
+            )
+        if scheduler.deferred:
+            if failed_tables:
+                logging.warning(
+                    f"Failed to create views for tables: {failed_tables}. "
+                    f"The next run will retry them first."
+                )
+            logging.warning(
+                f"The run deadline was reached, {len(scheduler.deferred)} buckets were deferred "
+                f"to the next run: {scheduler.deferred}"
+            )
+            checkpoint.save()
+        else:
+            # all tables were processed, the next run starts from the beginning
+            checkpoint.clear()
+
+    def _validate_warehouse_free(
+        self, additional_options: configuration.AdditionalOptions
+    ):
+        """
+        Warns about configured features that need compute and would resume a warehouse in the warehouse-free mode
+        """
+        if not self._configuration.warehouse_free:
+            return
+        compute_rules = [
+            r.table_pattern
+            for r in self._configuration.materialization_rules
+            if r.materialization != configuration.MATERIALIZATION_VIEW
+        ]
+        if compute_rules:
+            logging.warning(
+                f"Warehouse-free mode: dynamic tables and materialized views need compute "
+                f"and will resume a warehouse. Affected patterns: {compute_rules}"
+            )
+        if additional_options.query_timing_report:
+            logging.warning(
+                "Warehouse-free mode: the query timing report needs a warehouse and will be skipped."
+            )
+
+    def _prefetch_bucket_metadata(
+        self,
+        view_creator: ViewCreator,
+        bucket_ids: list[str],
+        state: dict,
+        additional_options: configuration.AdditionalOptions,
+    ):
+        if not additional_options.metadata_cache:
+            state.pop(KEY_METADATA_CACHE, None)
+            view_creator.prefetch_bucket_metadata(
+                bucket_ids, additional_options.metadata_max_concurrency
+            )
+            return
+
+        cache = MetadataResponseCache(
+            additional_options.metadata_cache_max_mb * 1024 * 1024,
+            additional_options.metadata_cache_max_age_hours * 60 * 60,
+        )
+        cache.load_from_state(state)
+        view_creator.prefetch_bucket_metadata(
+            bucket_ids, additional_options.metadata_max_concurrency, cache
+        )
+        # written together with the checkpoint at the end of the run
+        cache.save_to_state(state)
+
+    def _get_credentials(
+        self, destination: configuration.Destination = None
+    ) -> Credentials:
+        """
+        Returns Snowflake credentials, role and warehouse can be overridden by the destination
+        """
+        return Credentials(
+            account=self._configuration.account,
+            user=self._configuration.username,
+            password=self._configuration.pswd_password,
+            private_key=self._configuration.pswd_private_key,
+            private_key_pass=self._configuration.pswd_private_key_pass,
+            warehouse=(destination and destination.warehouse)
+            or self._configuration.warehouse,
+            role=(destination and destination.role) or self._configuration.role,
+            auth_type=self._configuration.auth_type,
+            warehouse_free=self._configuration.warehouse_free,
         )
 
-        for bucket_id in bucket_ids:
+    def _group_by_credentials(
+        self, destinations: list[configuration.Destination]
+    ) -> list[tuple[Credentials, list[configuration.Destination]]]:
+        groups: dict[tuple, tuple[Credentials, list]] = {}
+        for destination in destinations:
+            credentials = self._get_credentials(destination)
+            key = dataclasses.astuple(credentials)
+            groups.setdefault(key, (credentials, []))[1].append(destination)
+        return list(groups.values())
+
+    def _create_views(
+        self,
+        view_creator: ViewCreator,
+        checkpoint: RunCheckpoint,
+        scheduler: RunScheduler,
+        bucket_id: str,
+        destination: configuration.Destination,
+        view_options: dict,
+    ):
+        if checkpoint.is_bucket_done(destination.database, bucket_id):
             logging.info(
-                f"Creating views for {bucket_id} in destination database {self._configuration.destination_db}"
+                f"Views for {bucket_id} in {destination.database} already created, skipping"
             )
-            view_creator.create_views_from_bucket(
-                bucket_id,
-                self._configuration.destination_db,
-                column_name_case=additional_options.column_case,
-                view_name_case=additional_options.view_case,
-                schema_name_case=additional_options.schema_case,
-                use_bucket_alias=additional_options.use_bucket_alias,
-                use_table_alias=additional_options.use_table_alias,
-                session_id=self.environment_variables.run_id,
-                skip_shared_tables=additional_options.ignore_shared_tables,
-                drop_stage_prefix=additional_options.drop_stage_prefix,
-                schema_mapping=schema_mapping,
+            return
+        logging.info(
+            f"Creating views for {bucket_id} in destination database {destination.database}"
+        )
+        view_creator.create_views_from_bucket(
+            bucket_id,
+            destination.database,
+            column_name_case=destination.column_case,
+            view_name_case=destination.view_case,
+            schema_name_case=destination.schema_case,
+            use_bucket_alias=destination.use_bucket_alias,
+            use_table_alias=destination.use_table_alias,
+            drop_stage_prefix=destination.drop_stage_prefix,
+            checkpoint=checkpoint,
+            scheduler=scheduler,
+            **view_options,
+        )
+        # tables of partially processed buckets are kept in the checkpoint
+        if not scheduler.is_deferred(destination.database, bucket_id):
+            checkpoint.mark_bucket_done(destination.database, bucket_id)
+
+    def _build_plan_hash(self, bucket_ids: list[str]) -> str:
+        plan = {
+            k: v
+            for k, v in dataclasses.asdict(self._configuration).items()
+            if not k.startswith("pswd_")
+        }
+        plan["bucket_ids"] = bucket_ids
+        return RunCheckpoint.build_plan_hash(plan)
+
+    def _retry_failed_tables(
+        self,
+        view_creator: ViewCreator,
+        checkpoint: RunCheckpoint,
+        scheduler: RunScheduler,
+        destinations: list[configuration.Destination],
+        view_options: dict,
+    ):
+        if not checkpoint.failed_tables:
+            return
+        logging.info(f"Retrying {len(checkpoint.failed_tables)} failed tables")
+        failed_buckets = checkpoint.get_failed_buckets()
+        for credentials, destination_group in self._group_by_credentials(destinations):
+            with view_creator.shared_session(credentials):
+                for destination in destination_group:
+                    for database, bucket_id in failed_buckets:
+                        if database != destination.database:
+                            continue
+                        self._create_views(
+                            view_creator,
+                            checkpoint,
+                            scheduler,
+                            bucket_id,
+                            destination,
+                            view_options,
+                        )
+
+    def _report_query_timing(
+        self,
+        view_creator: ViewCreator,
+        database: str,
+        run_start: datetime,
+        limit: int,
+    ):
+        run_id = self.environment_variables.run_id
+        if not run_id:
+            logging.warning("Query timing report requires the KBC_RUNID, skipping.")
+            return
+        try:
+            report = view_creator.get_query_timing_report(
+                run_id,
+                database,
+                run_start.isoformat(sep=" ", timespec="seconds"),
+                limit,
             )
+            report.log()
+        except snowflake_errors.Error as e:
+            logging.warning(f"Failed to collect the query timing report: {e}")
 
     @sync_action("get_buckets")
     def get_available_buckets(self) -> list[SelectElement]:
@@ -153,20 +395,18 @@ class Component(ComponentBase):
         try:
             self._init_configuration()
             self._snowflake_client = snowflake_client.SnowflakeClient()
-            credentials = Credentials(
-                account=self._configuration.account,
-                user=self._configuration.username,
-                password=self._configuration.pswd_password,
-                private_key=self._configuration.pswd_private_key,
-                private_key_pass=self._configuration.pswd_private_key_pass,
-                warehouse=self._configuration.warehouse,
-                role=self._configuration.role,
-                auth_type=self._configuration.auth_type,
-            )
+            credentials = self._get_credentials()
             try:
                 with self._snowflake_client.connect(
                     credentials_obj=credentials
                 ) as client:
+                    if credentials.warehouse_free:
+                        # session context is returned on login, no statement is needed
+                        return ValidationResult(
+                            f"Connection successful (warehouse-free mode, no statement executed). "
+                            f"Session: {client.get_session_info()}",
+                            MessageType.SUCCESS,
+                        )
                     try:
                         result = client.execute_query(
                             "SELECT CURRENT_USER(), CURRENT_ROLE(), CURRENT_DATABASE();"
@@ -1,5 +1,6 @@
 import dataclasses
 import json
+import re
 from dataclasses import dataclass
 
 import dataconf
@@ -47,6 +48,10 @@ class ConfigurationBase:
         ]
 
 
+PROJECTION_CAST = "cast"
+PROJECTION_PRUNING = "pruning"
+
+
 @dataclass
 class AdditionalOptions(ConfigurationBase):
     column_case: str = "original"
@@ -56,6 +61,22 @@ class AdditionalOptions(ConfigurationBase):
     drop_stage_prefix: bool = False
     use_table_alias: bool = False
     ignore_shared_tables: bool = True
+    async_metadata_fetch: bool = True
+    metadata_max_concurrency: int = 20
+    metadata_cache: bool = False
+    metadata_cache_max_mb: int = 10
+    metadata_cache_max_age_hours: int = 24
+    query_timing_report: bool = False
+    query_timing_report_limit: int = 20
+    # 0 to disable the deadline
+    deadline_minutes: int = 0
+    priority_bucket_ids: list[str] = dataclasses.field(default_factory=list)
+    projection_mode: str = PROJECTION_CAST
+    # glob patterns or regular expressions prefixed with re:
+    include_tables: list[str] = dataclasses.field(default_factory=list)
+    exclude_tables: list[str] = dataclasses.field(default_factory=list)
+    include_columns: list[str] = dataclasses.field(default_factory=list)
+    exclude_columns: list[str] = dataclasses.field(default_factory=list)
 
 
 @dataclass
@@ -64,15 +85,64 @@ class SchemaMapping(ConfigurationBase):
     destination_schema: str
 
 
+MATERIALIZATION_VIEW = "view"
+MATERIALIZATION_DYNAMIC_TABLE = "dynamic_table"
+MATERIALIZATION_MATERIALIZED_VIEW = "materialized_view"
+MATERIALIZATIONS = [
+    MATERIALIZATION_VIEW,
+    MATERIALIZATION_DYNAMIC_TABLE,
+    MATERIALIZATION_MATERIALIZED_VIEW,
+]
+TARGET_LAG_PATTERN = re.compile(
+    r"^(DOWNSTREAM|\d+ (second|minute|hour|day)s?)$", re.IGNORECASE
+)
+
+
+@dataclass
+class MaterializationRule(ConfigurationBase):
+    # glob pattern matched against the table ID, e.g. in.c-sales.* or *.orders
+    table_pattern: str
+    materialization: str = MATERIALIZATION_VIEW
+    target_lag: str = "1 hour"
+    warehouse: str = ""
+
+
+@dataclass
+class Destination(ConfigurationBase):
+    database: str
+    # options overriding the additional options, None to inherit
+    column_case: str | None = None
+    view_case: str | None = None
+    schema_case: str | None = None
+    use_bucket_alias: bool | None = None
+    drop_stage_prefix: bool | None = None
+    use_table_alias: bool | None = None
+    # connection overrides, destinations with the same connection share the Snowflake session
+    role: str = ""
+    warehouse: str = ""
+
+
+DESTINATION_INHERITED_OPTIONS = [
+    "column_case",
+    "view_case",
+    "schema_case",
+    "use_bucket_alias",
+    "drop_stage_prefix",
+    "use_table_alias",
+]
+
+
 @dataclass
 class Configuration(ConfigurationBase):
     # Connection options
     auth_type: str = "key_pair"
     account: str = ""
     warehouse: str = ""
+    # connect without warehouse, only metadata-only statements are executed
+    warehouse_free: bool = False
     username: str = ""
     role: str = ""
-    destination_db: str = ""
+    destination_db: str | list[Destination] = ""
     bucket_ids: list[str] = dataclasses.field(default_factory=list)
     pswd_password: str = ""
     pswd_private_key: str = ""
@@ -80,6 +150,9 @@ class Configuration(ConfigurationBase):
     # Row configuration
     additional_options: AdditionalOptions | None = None
     schema_mapping: list[SchemaMapping] = dataclasses.field(default_factory=list)
+    materialization_rules: list[MaterializationRule] = dataclasses.field(
+        default_factory=list
+    )
     debug: bool = False
     pswd_storage_token: str = ""
     db_name_prefix: str = "KEBOOLA_"
@@ -101,3 +174,57 @@ class Configuration(ConfigurationBase):
                 f"Some bucket names are invalid in the schema mapping: {invalid_mapping}. "
                 f"Please use on of the selected buckets: {bucket_ids}"
             )
+
+    def get_destinations(self) -> list[Destination]:
+        """
+        Returns list of destinations, unset destination options are inherited from the additional options
+        Returns:
+
+        """
+        additional_options = self.additional_options or AdditionalOptions()
+        if isinstance(self.destination_db, str):
+            destinations = [Destination(self.destination_db)] if self.destination_db else []
+        else:
+            destinations = self.destination_db
+
+        if not destinations:
+            raise UserException("At least one destination database must be specified.")
+        databases = [d.database for d in destinations]
+        if len(set(databases)) != len(databases):
+            raise UserException(f"Destination databases must be unique: {databases}")
+
+        return [
+            dataclasses.replace(
+                d,
+                **{
+                    option: getattr(additional_options, option)
+                    for option in DESTINATION_INHERITED_OPTIONS
+                    if getattr(d, option) is None
+                },
+            )
+            for d in destinations
+        ]
+
+    def validate_materialization_rules(self):
+        """
+        Validates materialization type, target lag and warehouse of the materialization rules
+        Returns:
+
+        """
+        for rule in self.materialization_rules:
+            if rule.materialization not in MATERIALIZATIONS:
+                raise UserException(
+                    f"Invalid materialization '{rule.materialization}' for pattern '{rule.table_pattern}'. "
+                    f"Supported values are {MATERIALIZATIONS}"
+                )
+            if rule.materialization != MATERIALIZATION_DYNAMIC_TABLE:
+                continue
+            if not TARGET_LAG_PATTERN.match(rule.target_lag.strip()):
+                raise UserException(
+                    f"Invalid target lag '{rule.target_lag}' for pattern '{rule.table_pattern}'. "
+                    f"Use e.g. '1 hour', '30 minutes' or 'DOWNSTREAM'"
+                )
+            if not (rule.warehouse or self.warehouse):
+                raise UserException(
+                    f"Dynamic tables require a warehouse, set it for pattern '{rule.table_pattern}'"
+                )
@@ -1,5 +1,6 @@
 import functools
 import logging
+import re
 from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from cryptography.hazmat.primitives import serialization
@@ -21,6 +22,47 @@ class Credentials:
     schema: str = ""
     role: str = ""
     auth_type: str = "key_pair"
+    # connect without warehouse, only metadata statements are expected
+    warehouse_free: bool = False
+
+
+# statements served by the cloud services layer that do not need a running warehouse
+METADATA_ONLY_STATEMENT = re.compile(
+    r"^\s*("
+    r"SHOW\s|DESC\s|DESCRIBE\s|USE\s|ALTER\s+SESSION\s|DROP\s"
+    r"|CREATE\s+(OR\s+REPLACE\s+)?(SECURE\s+)?VIEW\s"
+    r"|CREATE\s+(OR\s+REPLACE\s+)?SCHEMA\s"
+    r"|SELECT\s+CURRENT_\w+\(\)(\s*,\s*CURRENT_\w+\(\))*\s*;?\s*$"
+    r")",
+    re.IGNORECASE,
+)
+# kinds of objects created by the component, an object of a different kind is dropped when the materialization changes
+OBJECT_KIND_VIEW = "VIEW"
+OBJECT_KIND_DYNAMIC_TABLE = "DYNAMIC TABLE"
+OBJECT_KIND_MATERIALIZED_VIEW = "MATERIALIZED VIEW"
+MANAGED_OBJECT_KINDS = [
+    OBJECT_KIND_VIEW,
+    OBJECT_KIND_DYNAMIC_TABLE,
+    OBJECT_KIND_MATERIALIZED_VIEW,
+]
+# a resumed warehouse is billed at least for this time
+MINIMUM_BILLED_SECONDS = 60
+
+
+def _get_select_query(statement: str) -> str:
+    """
+    Returns the query part of CREATE ... AS SELECT statement
+    """
+    match = re.search(r"\bAS\s+(SELECT\b.*)$", statement or "", re.IGNORECASE | re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _escape_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def _normalize_sql(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement or "").strip().rstrip(";")
 
 
 class NotConnectedError(Exception):
@@ -52,6 +94,12 @@ class SnowflakeClient:
     def __init__(self):
         self.__connection = None
         self.__cursor = None
+        self._warehouse_free = False
+        self.warehouse_free_sessions = 0
+        # SHOW WAREHOUSES row of the configured warehouse read at the start of the run, {} if it is not visible
+        self.warehouse_state = None
+        self.metadata_statements = 0
+        self.compute_statements = 0
 
     @contextmanager
     def connect(self, credentials_obj: Credentials, session_parameters=None):
@@ -60,8 +108,19 @@ class SnowflakeClient:
                 session_parameters = {}
             cfg = asdict(credentials_obj)
             cfg["session_parameters"] = session_parameters
+            self._warehouse_free = credentials_obj.warehouse_free
+            if self._warehouse_free:
+                cfg["warehouse"] = None
             self.__connection = self._create_snfk_connection(cfg, session_parameters)
             self.__cursor = self.__connection.cursor(snowflake.connector.DictCursor)
+            if self._warehouse_free:
+                self.warehouse_free_sessions += 1
+                if self.__connection.warehouse:
+                    logging.warning(
+                        f"Warehouse-free mode: the session uses the default warehouse "
+                        f"{self.__connection.warehouse} of the user. Unset the user's DEFAULT_WAREHOUSE "
+                        f"to make sure no warehouse can be resumed."
+                    )
             yield self
         finally:
             self.close()
@@ -136,7 +195,85 @@ class SnowflakeClient:
     @_check_connection
     def execute_query(self, query):
         logging.debug(f"{query}")
-        self._cursor.execute(query).fetchall()
+        if self._warehouse_free:
+            self._check_metadata_only(query)
+        return self._cursor.execute(query).fetchall()
+
+    @staticmethod
+    def is_metadata_only(query: str) -> bool:
+        return bool(METADATA_ONLY_STATEMENT.match(query))
+
+    def _check_metadata_only(self, query: str):
+        if self.is_metadata_only(query):
+            self.metadata_statements += 1
+            return
+        self.compute_statements += 1
+        logging.warning(
+            "Warehouse-free mode: the statement requires compute and would resume a warehouse "
+            "(or fail without one). (Query in detail)",
+            extra={"full_message": query},
+        )
+
+    @_check_connection
+    def get_session_info(self) -> dict:
+        """
+        Returns the session context received on login, no statement is executed.
+        """
+        return {
+            "user": self._connection.user,
+            "role": self._connection.role,
+            "database": self._connection.database,
+            "warehouse": self._connection.warehouse,
+        }
+
+    def read_warehouse_state(self, warehouse: str):
+        """
+        Reads the state of the configured warehouse once per run, SHOW WAREHOUSES does not resume it.
+        Args:
+            warehouse: Warehouse name, an exact match is preferred over a case-insensitive one
+
+        """
+        if self.warehouse_state is not None or not warehouse:
+            return
+        try:
+            rows = self.execute_query(f"SHOW WAREHOUSES LIKE '{_escape_string(warehouse)}'")
+        except snowflake.connector.errors.ProgrammingError as e:
+            logging.warning(f"Warehouse-free mode: failed to read the state of warehouse {warehouse}: {e}")
+            rows = []
+        self.warehouse_state = next((row for row in rows if row["name"] == warehouse), None) or next(
+            (row for row in rows if row["name"].upper() == warehouse.upper()), {}
+        )
+
+    def log_warehouse_free_summary(self):
+        if not self.warehouse_free_sessions:
+            return
+        logging.info(
+            f"Warehouse-free mode: {self.metadata_statements} metadata-only statements ran in "
+            f"{self.warehouse_free_sessions} sessions without a warehouse. {self.compute_statements} statements "
+            f"required compute."
+        )
+        state = self.warehouse_state
+        if self.compute_statements:
+            logging.info(
+                "Warehouse-free mode: no warehouse resume was avoided, the statements requiring compute use one."
+            )
+        elif not state:
+            logging.info(
+                "Warehouse-free mode: the state of the configured warehouse is not visible to the role, "
+                "no avoided warehouse resume is reported."
+            )
+        elif state.get("state") == "SUSPENDED" and str(state.get("auto_resume")).lower() == "true":
+            # the warehouse would run until auto-suspend after the last statement, billed at least one minute
+            billed_seconds = max(MINIMUM_BILLED_SECONDS, int(state.get("auto_suspend") or 0))
+            logging.info(
+                f"Warehouse-free mode: one resume of the suspended warehouse {state['name']} was avoided, "
+                f"saving ~{billed_seconds}s of warehouse compute (auto-suspend {state.get('auto_suspend')}s)."
+            )
+        else:
+            logging.info(
+                f"Warehouse-free mode: no warehouse resume was avoided, warehouse {state['name']} was "
+                f"{state.get('state')} with auto-resume {state.get('auto_resume')} at the start of the run."
+            )
 
     @validate_sql_placeholders
     def create_or_replace_view(
@@ -159,6 +296,133 @@ class SnowflakeClient:
         )
         self.execute_query(statement)
 
+    @validate_sql_placeholders
+    def create_or_replace_dynamic_table(
+        self,
+        name,
+        columns_definition: str,
+        source_table: str,
+        target_lag: str,
+        warehouse: str,
+        copy_grants: bool = False,
+    ):
+        copy_grants_query = ""
+        if copy_grants:
+            copy_grants_query = " COPY GRANTS"
+        if target_lag.upper() != "DOWNSTREAM":
+            target_lag = f"'{target_lag}'"
+        statement = (
+            f"CREATE OR REPLACE DYNAMIC TABLE {name} "
+            f'TARGET_LAG = {target_lag} WAREHOUSE = "{warehouse}"{copy_grants_query} '
+            f"AS SELECT {columns_definition} FROM {source_table}"
+        )
+        logging.info(
+            f"Creating dynamic table {name}. (Query in detail)",
+            extra={"full_message": statement},
+        )
+        self.execute_query(statement)
+
+    @validate_sql_placeholders
+    def create_or_replace_materialized_view(
+        self,
+        name,
+        columns_definition: str,
+        source_table: str,
+        copy_grants: bool = False,
+    ):
+        copy_grants_query = ""
+        if copy_grants:
+            copy_grants_query = " COPY GRANTS"
+        statement = (
+            f"CREATE OR REPLACE MATERIALIZED VIEW {name}{copy_grants_query} "
+            f"AS SELECT {columns_definition} FROM {source_table}"
+        )
+        logging.info(
+            f"Creating materialized view {name}. (Query in detail)",
+            extra={"full_message": statement},
+        )
+        self.execute_query(statement)
+
+    def _show_object(
+        self, object_type: str, database: str, schema_name: str, name: str
+    ) -> dict:
+        """
+        Returns the SHOW <object_type> row of the object with exactly matching name or None if it does not exist
+        """
+        rows = self.execute_query(
+            f"SHOW {object_type} LIKE '{_escape_string(name)}' IN SCHEMA \"{database}\".\"{schema_name}\""
+        )
+        return next((row for row in rows if row["name"] == name), None)
+
+    @validate_sql_placeholders
+    def get_object_kind(self, database: str, schema_name: str, name: str) -> str:
+        """
+        Returns the kind of existing object, e.g. VIEW, DYNAMIC TABLE, MATERIALIZED VIEW or TABLE.
+        Args:
+            database:
+            schema_name:
+            name: Object name, matched case-sensitively
+
+        Returns: Kind of the object or None if it does not exist
+
+        """
+        row = self._show_object("OBJECTS", database, schema_name, name)
+        if not row:
+            return None
+        if str(row.get("is_dynamic", "")).upper() in ("Y", "TRUE"):
+            return OBJECT_KIND_DYNAMIC_TABLE
+        return row["kind"].replace("_", " ").upper()
+
+    @validate_sql_placeholders
+    def is_dynamic_table_unchanged(
+        self,
+        database: str,
+        schema_name: str,
+        name: str,
+        columns_definition: str,
+        source_table: str,
+        target_lag: str,
+        warehouse: str,
+    ) -> bool:
+        """
+        Returns True if the dynamic table exists with the same query, target lag and warehouse,
+        so it does not need to be replaced (and reinitialized).
+        """
+        row = self._show_object("DYNAMIC TABLES", database, schema_name, name)
+        return bool(
+            row
+            and _normalize_sql(_get_select_query(row.get("text")))
+            == _normalize_sql(f"SELECT {columns_definition} FROM {source_table}")
+            and _normalize_sql(row.get("target_lag")).strip("'").upper()
+            == _normalize_sql(target_lag).strip("'").upper()
+            and row.get("warehouse") == warehouse
+        )
+
+    @validate_sql_placeholders
+    def is_materialized_view_unchanged(
+        self,
+        database: str,
+        schema_name: str,
+        name: str,
+        columns_definition: str,
+        source_table: str,
+    ) -> bool:
+        """
+        Returns True if the materialized view exists with the same query, so it does not need to be rebuilt.
+        """
+        row = self._show_object("MATERIALIZED VIEWS", database, schema_name, name)
+        return bool(
+            row
+            and _normalize_sql(_get_select_query(row.get("text")))
+            == _normalize_sql(f"SELECT {columns_definition} FROM {source_table}")
+        )
+
+    @validate_sql_placeholders
+    def drop_object(self, kind: str, name: str):
+        statement = f"DROP {kind} IF EXISTS {name}"
+        logging.info(f"Dropping {kind.lower()} {name}")
+        self.execute_query(statement)
+
     @validate_sql_placeholders
     def create_or_replace_schema(
         self, database: str, schema_name: str, copy_grants: bool = False
@@ -186,6 +450,58 @@ class SnowflakeClient:
     def use_role(self, role: str):
         self.execute_query(f"USE ROLE {role};")
 
+    @validate_sql_placeholders
+    @_check_connection
+    def set_query_tag(self, query_tag: str):
+        query_tag = query_tag.replace("'", "''")
+        self.execute_query(f"ALTER SESSION SET QUERY_TAG = '{query_tag}'")
+
+    @validate_sql_placeholders
+    def get_query_history_by_run_id(
+        self,
+        database: str,
+        run_id: str,
+        start_time: str,
+        result_limit: int = 10000,
+        session_id: int = None,
+    ) -> list[dict]:
+        """
+        Returns timing of all statements issued since start_time whose query tag contains the given runId.
+        Args:
+            database: Any database accessible by the current role, used to resolve INFORMATION_SCHEMA
+            run_id: runId value of the query tag
+            start_time: ISO formatted timestamp of the run start
+            result_limit: Maximum number of history rows scanned,
+                          the limit is applied before the rows are filtered by the query tag
+            session_id: If specified, only statements of the session are scanned (QUERY_HISTORY_BY_SESSION),
+                        so other queries of the user do not count towards the result_limit
+
+        Returns: List of rows, timings are in milliseconds
+
+        """
+        if session_id:
+            history_function = (
+                f"QUERY_HISTORY_BY_SESSION(SESSION_ID => {int(session_id)}, "
+            )
+        else:
+            history_function = "QUERY_HISTORY("
+        # SCANNED_ROWS is counted before the filter to detect the truncation by the result_limit
+        statement = (
+            "SELECT * FROM (SELECT QUERY_ID, QUERY_TYPE, QUERY_TAG, EXECUTION_STATUS, TOTAL_ELAPSED_TIME, "
+            "COMPILATION_TIME, EXECUTION_TIME, TRANSACTION_BLOCKED_TIME, "
+            "QUEUED_PROVISIONING_TIME + QUEUED_REPAIR_TIME + QUEUED_OVERLOAD_TIME AS QUEUED_TIME, "
+            "COUNT(*) OVER () AS SCANNED_ROWS "
+            f'FROM TABLE("{database}".INFORMATION_SCHEMA.{history_function}'
+            f"END_TIME_RANGE_START => TO_TIMESTAMP_LTZ('{start_time}'), "
+            f"RESULT_LIMIT => {int(result_limit)}))) "
+            f"WHERE TRY_PARSE_JSON(QUERY_TAG):runId::STRING = '{run_id}'"
+        )
+        return self.execute_query(statement)
+
+    @property
+    def session_id(self) -> int:
+        return self._connection.session_id if self._connection else None
+
     @property
     def _cursor(self) -> SnowflakeCursor:
         if not self.__cursor:
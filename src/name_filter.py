@@ -0,0 +1,49 @@
+import fnmatch
+import re
+from typing import List, Optional
+
+from keboola.component.exceptions import UserException
+
+REGEX_PREFIX = 're:'
+
+
+class NameFilter:
+    """
+    Include/exclude filter of object names (table IDs, column names).
+
+    Patterns are globs (e.g. `in.c-sales.*`) or regular expressions prefixed with `re:` (e.g. `re:.*_snapshot$`)
+    and must match the whole name. All patterns are compiled once into a single regular expression per list.
+    A name passes if it matches any include pattern (or there are none) and no exclude pattern.
+    """
+
+    def __init__(self, include: List[str] = None, exclude: List[str] = None):
+        self._include = self._compile(include)
+        self._exclude = self._compile(exclude)
+
+    @property
+    def is_empty(self) -> bool:
+        return self._include is None and self._exclude is None
+
+    def matches(self, name: str) -> bool:
+        if self.is_empty:
+            return True
+        if self._include is not None and not self._include.fullmatch(name):
+            return False
+        return self._exclude is None or not self._exclude.fullmatch(name)
+
+    @staticmethod
+    def _compile(patterns: List[str] = None) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        expressions = []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                expression = pattern[len(REGEX_PREFIX):]
+                try:
+                    re.compile(expression)
+                except re.error as e:
+                    raise UserException(f"Invalid regular expression '{pattern}': {e}") from e
+            else:
+                expression = fnmatch.translate(pattern)
+            expressions.append(f'(?:{expression})')
+        return re.compile('|'.join(expressions))
@@ -0,0 +1,92 @@
+import json
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List
+
+# query tag switches are reported separately so they are not counted as view time
+QUERY_TYPE_ALTER_SESSION = 'ALTER_SESSION'
+
+
+@dataclass
+class ViewTiming:
+    table_id: str
+    view_name: str
+    statements: int = 0
+    total_elapsed_ms: int = 0
+    compilation_ms: int = 0
+    queued_ms: int = 0
+    blocked_ms: int = 0
+    execution_ms: int = 0
+
+
+@dataclass
+class QueryTimingReport:
+    statements: int = 0
+    total_elapsed_ms: int = 0
+    compilation_ms: int = 0
+    queued_ms: int = 0
+    blocked_ms: int = 0
+    execution_ms: int = 0
+    alter_session_statements: int = 0
+    alter_session_ms: int = 0
+    slowest_views: List[ViewTiming] = field(default_factory=list)
+
+    def log(self):
+        logging.info(f'Snowflake server-side timing of {self.statements} statements: '
+                     f'total {self.total_elapsed_ms} ms, compilation {self.compilation_ms} ms, '
+                     f'queued {self.queued_ms} ms, blocked by locks {self.blocked_ms} ms, '
+                     f'execution {self.execution_ms} ms. Query tag switches: {self.alter_session_statements} '
+                     f'ALTER SESSION statements, total {self.alter_session_ms} ms. (Slowest views in detail)',
+                     extra={'full_message': json.dumps(asdict(self), indent=2)})
+        for v in self.slowest_views:
+            logging.info(f'{v.view_name}: total {v.total_elapsed_ms} ms, compilation {v.compilation_ms} ms, '
+                         f'queued {v.queued_ms} ms, blocked {v.blocked_ms} ms')
+
+
+def build_query_timing_report(query_history: List[dict], created_views: Dict[tuple, str],
+                              limit: int = 20) -> QueryTimingReport:
+    """
+    Aggregates QUERY_HISTORY rows of a run and joins them to the created views
+    using the database and tableId of the query tag. ALTER SESSION statements are aggregated separately.
+    Args:
+        query_history: Rows returned by SnowflakeClient.get_query_history_by_run_id
+        created_views: Dict of (destination_database, table_id) => fully qualified view name
+        limit: Number of slowest views to report
+
+    Returns:
+
+    """
+    report = QueryTimingReport()
+    view_timings: Dict[tuple, ViewTiming] = {}
+    for row in query_history:
+        timing = (row['TOTAL_ELAPSED_TIME'] or 0, row['COMPILATION_TIME'] or 0, row['QUEUED_TIME'] or 0,
+                  row['TRANSACTION_BLOCKED_TIME'] or 0, row['EXECUTION_TIME'] or 0)
+        if row.get('QUERY_TYPE') == QUERY_TYPE_ALTER_SESSION:
+            report.alter_session_statements += 1
+            report.alter_session_ms += timing[0]
+            continue
+        _add_timing(report, timing)
+
+        try:
+            query_tag = json.loads(row['QUERY_TAG'])
+            view_key = (query_tag.get('database'), query_tag.get('tableId'))
+        except (TypeError, ValueError, AttributeError):
+            continue
+        if view_key not in created_views:
+            continue
+        if view_key not in view_timings:
+            view_timings[view_key] = ViewTiming(view_key[1], created_views[view_key])
+        _add_timing(view_timings[view_key], timing)
+
+    report.slowest_views = sorted(view_timings.values(), key=lambda v: v.total_elapsed_ms, reverse=True)[:limit]
+    return report
+
+
+def _add_timing(target, timing: tuple):
+    total, compilation, queued, blocked, execution = timing
+    target.statements += 1
+    target.total_elapsed_ms += total
+    target.compilation_ms += compilation
+    target.queued_ms += queued
+    target.blocked_ms += blocked
+    target.execution_ms += execution
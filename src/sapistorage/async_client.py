@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from kbcstorage.auth import coerce
+
+from sapistorage.response_cache import CacheEntry, MetadataResponseCache
+
+DEFAULT_MAX_CONCURRENCY = 20
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+# total timeout of a single request attempt, large table listings with column metadata take tens of seconds
+DEFAULT_REQUEST_TIMEOUT = 120
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncStorageMetadataClient:
+    """
+    Asyncio based client for the read-only Storage API metadata endpoints used by the ViewCreator.
+
+    All requests share a single pooled keep-alive session and the number of requests in flight is bounded
+    by a semaphore. Failed requests (retryable statuses, connection errors and timeouts) are retried with
+    an exponential backoff, the semaphore is not held while waiting. Responses are the parsed JSON bodies,
+    i.e. the same shapes as returned by `kbcstorage.client.Client.buckets`.
+
+    If a response cache is provided, cached responses are reused without a request while the change marker
+    (bucket lastChangeDate) is unchanged and the entry is not older than the maximum age, otherwise they are
+    revalidated using conditional requests. Table listings containing aliases are always revalidated,
+    as changes of the source tables do not change the lastChangeDate of the alias bucket.
+    """
+
+    def __init__(self, root_url: str, token: str,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 keepalive_timeout: int = DEFAULT_KEEPALIVE_TIMEOUT,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 cache: MetadataResponseCache = None):
+        self._base_url = f'{root_url.rstrip("/")}/v2/storage/buckets'
+        self._headers = {**coerce(token).headers(),
+                         'X-KBC-RunId': os.environ.get('KBC_RUNID') or '',
+                         'Accept-Encoding': 'gzip',
+                         'User-Agent': 'Keboola Snowflake BYODB View Writer'}
+        self._max_concurrency = max_concurrency
+        self._max_retries = max_retries
+        self._keepalive_timeout = keepalive_timeout
+        self._request_timeout = request_timeout
+        self._cache = cache
+        self._session: aiohttp.ClientSession = None
+        self._semaphore: asyncio.Semaphore = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self._max_concurrency,
+                                         keepalive_timeout=self._keepalive_timeout)
+        self._session = aiohttp.ClientSession(headers=self._headers, connector=connector,
+                                              timeout=aiohttp.ClientTimeout(total=self._request_timeout),
+                                              version=aiohttp.HttpVersion11)
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._session.close()
+        self._session = None
+
+    async def _get(self, url: str, params: dict = None, change_marker: str = '',
+                   is_change_marker_reliable: Callable[[object], bool] = None):
+        """
+        Returns the parsed response body, using the cache if provided.
+        Args:
+            url:
+            params:
+            change_marker: Cached response is used without a request while the change marker is unchanged
+            is_change_marker_reliable: Decides based on the response body whether the change marker
+                                       reflects all changes of the response
+
+        Returns:
+
+        """
+        cache_key = MetadataResponseCache.build_key(url, params)
+        cached = self._cache.get(cache_key) if self._cache else None
+        if cached and change_marker and cached.change_marker == change_marker and self._cache.is_fresh(cached):
+            self._cache.hits += 1
+            return cached.get_body()
+
+        headers = cached.get_validators() if cached else {}
+        for attempt in range(self._max_retries + 1):
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params, headers=headers) as response:
+                        if response.status not in RETRY_STATUSES or attempt == self._max_retries:
+                            return await self._read_response(response, cache_key, cached, change_marker,
+                                                             is_change_marker_reliable)
+                        error = f'status {response.status}'
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self._max_retries:
+                    raise
+                error = repr(e)
+            backoff = 2 ** attempt
+            logging.debug(f'Request {url} failed with {error}, retrying in {backoff}s')
+            await asyncio.sleep(backoff)
+
+    async def _read_response(self, response: aiohttp.ClientResponse, cache_key: str, cached: Optional[CacheEntry],
+                             change_marker: str, is_change_marker_reliable: Callable[[object], bool] = None):
+        if cached and response.status == 304:
+            body = cached.get_body()
+            self._cache.hits += 1
+            self._cache.touch(cache_key, self._get_change_marker(body, change_marker, is_change_marker_reliable))
+            return body
+        response.raise_for_status()
+        body = await response.json()
+        if self._cache:
+            self._cache.misses += 1
+            self._cache.put(cache_key, body, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                            self._get_change_marker(body, change_marker, is_change_marker_reliable))
+        return body
+
+    @staticmethod
+    def _get_change_marker(body, change_marker: str, is_change_marker_reliable: Callable[[object], bool] = None):
+        if is_change_marker_reliable and not is_change_marker_reliable(body):
+            return ''
+        return change_marker
+
+    async def list_buckets(self) -> List[dict]:
+        return await self._get(self._base_url)
+
+    async def bucket_detail(self, bucket_id: str, change_marker: str = '') -> dict:
+        return await self._get(f'{self._base_url}/{bucket_id}', change_marker=change_marker)
+
+    async def list_tables(self, bucket_id: str, include: List[str] = None, change_marker: str = '') -> List[dict]:
+        params = {}
+        if include:
+            params['include'] = ','.join(include)
+        return await self._get(f'{self._base_url}/{bucket_id}/tables', params=params, change_marker=change_marker,
+                               is_change_marker_reliable=_contains_no_aliases)
+
+    async def fetch_buckets_metadata(self, bucket_ids: List[str],
+                                     include: List[str] = None) -> Dict[str, Tuple[dict, List[dict]]]:
+        """
+        Fetches bucket detail and table listing of all buckets concurrently.
+        Buckets whose metadata could not be fetched are logged and left out of the result.
+        Args:
+            bucket_ids: Storage bucket IDs
+            include: Table properties to include in the table listing, e.g. ['columns', 'columnMetadata']
+
+        Returns: Dict of bucket_id => (bucket_detail, tables)
+
+        """
+        change_markers = {}
+        if self._cache:
+            # single cheap probe for all buckets, unchanged buckets are served from the cache
+            try:
+                change_markers = {b['id']: b.get('lastChangeDate') or '' for b in await self.list_buckets()}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f'Failed to list buckets, all cached responses are revalidated: {e!r}')
+
+        async def _fetch_bucket(bucket_id: str):
+            change_marker = change_markers.get(bucket_id, '')
+            return await asyncio.gather(self.bucket_detail(bucket_id, change_marker),
+                                        self.list_tables(bucket_id, include, change_marker))
+
+        results = await asyncio.gather(*[_fetch_bucket(bucket_id) for bucket_id in bucket_ids],
+                                       return_exceptions=True)
+        bucket_metadata = {}
+        for bucket_id, result in zip(bucket_ids, results):
+            if isinstance(result, Exception):
+                logging.warning(f'Failed to fetch metadata of bucket {bucket_id}: {result!r}')
+                continue
+            bucket_metadata[bucket_id] = tuple(result)
+        return bucket_metadata
+
+
+def _contains_no_aliases(tables: List[dict]) -> bool:
+    # metadata of alias tables come from the source table in another bucket or project
+    return not any(t.get('isAlias') for t in tables)
+
+
+def fetch_buckets_metadata(root_url: str, token: str, bucket_ids: List[str], include: List[str] = None,
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           cache: MetadataResponseCache = None) -> Dict[str, Tuple[dict, List[dict]]]:
+    """
+    Blocking helper running `AsyncStorageMetadataClient.fetch_buckets_metadata` in a new event loop.
+    """
+
+    async def _run():
+        async with AsyncStorageMetadataClient(root_url, token, max_concurrency=max_concurrency,
+                                              cache=cache) as client:
+            return await client.fetch_buckets_metadata(bucket_ids, include)
+
+    return asyncio.run(_run())
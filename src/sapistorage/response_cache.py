@@ -0,0 +1,110 @@
+import base64
+import json
+import logging
+import time
+import zlib
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+KEY_METADATA_CACHE = 'metadata_cache'
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+@dataclass
+class CacheEntry:
+    # serialized response body, so the cached value is not affected by modifications of the returned objects
+    body: str
+    etag: str = ''
+    last_modified: str = ''
+    # cheap change probe value, e.g. lastChangeDate of the bucket
+    change_marker: str = ''
+    last_used: float = 0
+    # time of the last download or successful revalidation, entries stored without it are expired
+    validated_at: float = 0
+
+    def get_body(self):
+        return json.loads(self.body)
+
+    def get_validators(self) -> Dict[str, str]:
+        """
+        Returns: Conditional request headers
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class MetadataResponseCache:
+    """
+    Size bounded cache of Storage API metadata responses persisted in the component state.
+
+    Entries are keyed by endpoint and parameters. When the size limit is exceeded,
+    the least recently used entries are evicted. Entries older than the maximum age must be revalidated
+    before they are used.
+    """
+
+    def __init__(self, max_size_bytes: int = 10 * 1024 * 1024, max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS):
+        self._max_size_bytes = max_size_bytes
+        self._max_age_seconds = max_age_seconds
+        self._entries: Dict[str, CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def build_key(url: str, params: dict = None) -> str:
+        if not params:
+            return url
+        return f'{url}?{urlencode(sorted(params.items()))}'
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry:
+            entry.last_used = time.time()
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.validated_at <= self._max_age_seconds
+
+    def put(self, key: str, body, etag: str = '', last_modified: str = '', change_marker: str = ''):
+        now = time.time()
+        self._entries[key] = CacheEntry(json.dumps(body, separators=(',', ':')), etag or '', last_modified or '',
+                                        change_marker or '', now, now)
+
+    def touch(self, key: str, change_marker: str = ''):
+        """
+        Marks the entry as used and still valid
+        """
+        entry = self._entries[key]
+        entry.last_used = entry.validated_at = time.time()
+        entry.change_marker = change_marker or ''
+
+    def load_from_state(self, state: dict):
+        data = state.get(KEY_METADATA_CACHE)
+        if not data:
+            return
+        try:
+            entries = json.loads(zlib.decompress(base64.b64decode(data)))
+            self._entries = {key: CacheEntry(**entry) for key, entry in entries.items()}
+        except (ValueError, TypeError, zlib.error) as e:
+            logging.warning(f'Failed to load the metadata cache from state, starting with an empty cache: {e}')
+            self._entries = {}
+
+    def save_to_state(self, state: dict):
+        self._evict()
+        entries = {key: asdict(entry) for key, entry in self._entries.items()}
+        data = zlib.compress(json.dumps(entries, separators=(',', ':')).encode('utf-8'))
+        state[KEY_METADATA_CACHE] = base64.b64encode(data).decode('ascii')
+        logging.info(f'Metadata cache: {self.hits} hits, {self.misses} misses, {len(self._entries)} entries '
+                     f'stored ({len(data)} bytes compressed)')
+
+    def _evict(self):
+        size = sum(len(e.body) for e in self._entries.values())
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1].last_used):
+            if size <= self._max_size_bytes:
+                break
+            size -= len(entry.body)
+            del self._entries[key]
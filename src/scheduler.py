@@ -0,0 +1,114 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List
+
+# estimates are inflated to finish safely before the deadline
+SAFETY_FACTOR = 1.2
+
+
+class RunScheduler:
+    """
+    Orders the buckets by priority and decides whether the next views can still be created before the deadline.
+
+    Remaining time is estimated from the latency of the views created so far in the run. The deadline is checked
+    before each view, so large buckets are processed partially and the processed tables are kept in the checkpoint.
+    The first view is always started, so each run makes progress even if the estimate would not fit.
+    """
+
+    def __init__(self, deadline_seconds: int = 0, start_time: float = None):
+        self._deadline_seconds = deadline_seconds
+        self._start_time = start_time if start_time is not None else time.monotonic()
+        self._total_seconds = 0.0
+        self._total_views = 0
+        self.deferred: List[tuple] = []
+
+    @staticmethod
+    def order_buckets(bucket_ids: List[str], bucket_details: Dict[str, dict], priority_bucket_ids: List[str] = None,
+                      failed_bucket_ids: List[str] = None) -> List[str]:
+        """
+        Orders buckets: explicitly prioritized buckets (in the given order) first, then buckets that failed
+        in the last run, then the most recently changed buckets.
+        Args:
+            bucket_ids:
+            bucket_details: bucket_id => bucket detail containing lastChangeDate
+            priority_bucket_ids: explicitly prioritized buckets
+            failed_bucket_ids: buckets containing views that failed last time
+
+        Returns:
+
+        """
+        priority_bucket_ids = priority_bucket_ids or []
+        failed_bucket_ids = set(failed_bucket_ids or [])
+
+        def _priority(bucket_id: str):
+            explicit = priority_bucket_ids.index(bucket_id) if bucket_id in priority_bucket_ids \
+                else len(priority_bucket_ids)
+            last_change = _parse_timestamp(bucket_details.get(bucket_id, {}).get('lastChangeDate'))
+            return explicit, bucket_id not in failed_bucket_ids, -last_change
+
+        return sorted(bucket_ids, key=_priority)
+
+    @property
+    def view_seconds(self) -> float:
+        if not self._total_views:
+            return 0.0
+        return self._total_seconds / self._total_views
+
+    def record(self, duration_seconds: float, views: int):
+        self._total_seconds += duration_seconds
+        self._total_views += views
+
+    def can_start(self, destination: str, bucket_id: str, views: int) -> bool:
+        """
+        Returns False and defers the bucket if not even a single view is expected to finish before the deadline.
+        Buckets that do not fit as a whole are started and processed partially.
+        Args:
+            destination: destination database
+            bucket_id:
+            views: number of views to be created
+
+        Returns:
+
+        """
+        if not self._fits(views) and self._fits(1):
+            logging.info(f'{views} views of {bucket_id} in {destination} are not expected to finish before '
+                         f'the deadline, the bucket may be processed partially.')
+        return self.can_start_view(destination, bucket_id)
+
+    def can_start_view(self, destination: str, bucket_id: str) -> bool:
+        """
+        Returns False and defers the bucket if the next view is not expected to finish before the deadline.
+        Args:
+            destination: destination database
+            bucket_id:
+
+        Returns:
+
+        """
+        if self._fits(1):
+            return True
+        if (destination, bucket_id) not in self.deferred:
+            logging.info(f'The deadline would be exceeded, deferring remaining views of {bucket_id} '
+                         f'in {destination}.')
+            self.deferred.append((destination, bucket_id))
+        return False
+
+    def is_deferred(self, destination: str, bucket_id: str) -> bool:
+        return (destination, bucket_id) in self.deferred
+
+    def _fits(self, views: int) -> bool:
+        # nothing is deferred before the first view is measured
+        if not self._deadline_seconds or not self._total_views:
+            return True
+        elapsed = time.monotonic() - self._start_time
+        return elapsed + views * self.view_seconds * SAFETY_FACTOR <= self._deadline_seconds
+
+
+def _parse_timestamp(value: str) -> float:
+    if not value:
+        return 0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0
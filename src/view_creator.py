@@ -1,11 +1,31 @@
+import fnmatch
+import functools
+import json
+import logging
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Dict, List
 
+import snowflake.connector.errors as snowflake_errors
 from kbcstorage.client import Client
 from keboola.component import UserException
 
-from configuration import SchemaMapping
-from dbstorage.snowflake_client import SnowflakeClient, Credentials
+from checkpoint import RunCheckpoint
+from configuration import SchemaMapping, MaterializationRule, MATERIALIZATION_DYNAMIC_TABLE, \
+    MATERIALIZATION_MATERIALIZED_VIEW, PROJECTION_CAST, PROJECTION_PRUNING
+from dbstorage.snowflake_client import SnowflakeClient, Credentials, OBJECT_KIND_VIEW, OBJECT_KIND_DYNAMIC_TABLE, \
+    OBJECT_KIND_MATERIALIZED_VIEW, MANAGED_OBJECT_KINDS
+from name_filter import NameFilter
+from query_timing_report import QueryTimingReport, build_query_timing_report
+from scheduler import RunScheduler
+from sapistorage import async_client
+from sapistorage.response_cache import MetadataResponseCache
+
+TABLE_INCLUDE = ['columns', 'columnMetadata']
+STRING_TYPES = ['STRING', 'TEXT', 'VARCHAR']
+# maximum RESULT_LIMIT of the INFORMATION_SCHEMA query history functions
+QUERY_HISTORY_RESULT_LIMIT = 10000
 
 
 @dataclass
@@ -30,9 +50,20 @@ class ViewCreator:
         self._snowflake_client = SnowflakeClient()
         self.__snowflake_credentials = snowflake_credentials
         self._sapi_client = Client(kbc_root_url, storage_token)
+        self._kbc_root_url = kbc_root_url
+        self._storage_token = storage_token
         self._project_id = project_id
         self._system_name_prefix = system_name_prefix
         self._current_project_id = project_id
+        # metadata are fetched and resolved once and shared by all destinations
+        self._bucket_details: Dict[str, dict] = {}
+        self._bucket_tables: Dict[str, List[dict]] = {}
+        self._table_columns: Dict[str, Dict[str, StorageDataType]] = {}
+        # (destination_database, table_id) => fully qualified name of the created view
+        self._created_views: Dict[tuple, str] = {}
+        self._shared_session = False
+        # Snowflake sessions used to create the views, the query timing report is collected per session
+        self._session_ids: List[int] = []
 
     def _group_by_timestamp(self, data: dict):
         result = {}
@@ -91,25 +122,95 @@ class ViewCreator:
 
         return column_datatypes
 
+    @staticmethod
+    def _get_native_column_types(table_response: dict) -> Dict[str, StorageDataType]:
+        """
+        Loads physical column types of natively typed table from the table definition
+        Args:
+            table_response:
+
+        Returns:
+
+        """
+        definition = table_response.get('definition') or {}
+        return {c['name']: StorageDataType(c.get('basetype') or '', (c.get('definition') or {}).get('length'))
+                for c in definition.get('columns', [])}
+
+    @staticmethod
+    def _is_native_typed(table_response: dict) -> bool:
+        # isTyped may be missing from the response, typed tables always contain the definition
+        return table_response.get('isTyped', bool(table_response.get('definition')))
+
     def _build_column_definitions(self, table_columns: Dict[str, StorageDataType], column_name_case: str = 'original',
-                                  is_native_typed: bool = False) -> str:
+                                  is_native_typed: bool = False, projection_mode: str = PROJECTION_CAST,
+                                  native_columns: Dict[str, StorageDataType] = None) -> str:
+        native_columns = native_columns or {}
         column_definitions = []
         for name, dtype in table_columns.items():
-            # Anything that is not STRING needs to be wrapped in  NULLIF
-            if not is_native_typed and (dtype.type.upper() != 'STRING' or dtype.nullable):
-                identifier_name = f'NULLIF("{name}", \'\')'
+            if projection_mode == PROJECTION_CAST:
+                column_expression = self._build_cast_column_expression(name, dtype, is_native_typed)
+            elif projection_mode == PROJECTION_PRUNING:
+                column_expression = self._build_prunable_column_expression(name, dtype, is_native_typed,
+                                                                           native_columns.get(name))
             else:
-                identifier_name = f'"{name}"'
+                raise ValueError(f"Invalid projection mode '{projection_mode}', "
+                                 f"supported values are ['{PROJECTION_CAST}','{PROJECTION_PRUNING}']")
 
-            column_def = f'{identifier_name}::{dtype.type}'
-            # Only NUMERIC types can have length
-            if dtype.length and dtype.type.upper() in ['NUMERIC', 'STRING']:
-                column_def += f'({dtype.length})'
-            column_def += f' AS "{self._convert_case(name, column_name_case)}"'
-            column_definitions.append(column_def)
+            column_definitions.append(f'{column_expression} AS "{self._convert_case(name, column_name_case)}"')
 
         return ','.join(column_definitions)
 
+    @staticmethod
+    def _get_type_definition(dtype: StorageDataType) -> str:
+        type_definition = dtype.type
+        # Only NUMERIC types can have length
+        if dtype.length and dtype.type.upper() in ['NUMERIC', 'STRING']:
+            type_definition += f'({dtype.length})'
+        return type_definition
+
+    def _build_cast_column_expression(self, name: str, dtype: StorageDataType, is_native_typed: bool) -> str:
+        # Anything that is not STRING needs to be wrapped in  NULLIF
+        if not is_native_typed and (dtype.type.upper() != 'STRING' or dtype.nullable):
+            identifier_name = f'NULLIF("{name}", \'\')'
+        else:
+            identifier_name = f'"{name}"'
+
+        return f'{identifier_name}::{self._get_type_definition(dtype)}'
+
+    def _build_prunable_column_expression(self, name: str, dtype: StorageDataType, is_native_typed: bool,
+                                          native_type: StorageDataType = None) -> str:
+        """
+        Builds column expression keeping the bare column reference wherever the cast would be a no-op,
+        so filters on the view column can still be used for micro-partition pruning.
+        Args:
+            name: column name
+            dtype: type from the column metadata
+            is_native_typed: source table is natively typed
+            native_type: physical type of the column in natively typed table
+
+        Returns:
+
+        """
+        identifier_name = f'"{name}"'
+        type_definition = self._get_type_definition(dtype)
+
+        if is_native_typed:
+            if native_type and native_type.type.upper() == dtype.type.upper() \
+                    and (not dtype.length or dtype.length == native_type.length):
+                return identifier_name
+            return f'{identifier_name}::{type_definition}'
+
+        # source column is VARCHAR, empty and invalid values are converted to NULL
+        if dtype.type.upper() not in STRING_TYPES:
+            return f'TRY_CAST({identifier_name} AS {type_definition})'
+
+        # empty strings are converted to NULL same as in the cast mode, only non-nullable STRING is kept as is
+        if dtype.type.upper() != 'STRING' or dtype.nullable:
+            identifier_name = f'NULLIF({identifier_name}, \'\')'
+        if dtype.length and dtype.type.upper() == 'STRING':
+            return f'{identifier_name}::{type_definition}'
+        return identifier_name
+
     @staticmethod
     def _convert_case(identifier: str, case_conversion: str = 'original'):
         """
@@ -136,6 +237,99 @@ class ViewCreator:
     def get_all_bucket_ids(self):
         return [b['id'] for b in self._sapi_client.buckets.list()]
 
+    def prefetch_bucket_metadata(self, bucket_ids: List[str], max_concurrency: int = 20,
+                                 cache: MetadataResponseCache = None):
+        """
+        Fetches bucket details and table listings of all buckets concurrently using the async metadata client.
+        Subsequent calls for these buckets are served from memory. Buckets whose async fetch failed
+        are loaded by the synchronous Storage API client when they are processed.
+        Args:
+            bucket_ids:
+            max_concurrency: Maximum number of Storage API requests in flight
+            cache: Optional response cache persisted between runs
+
+        Returns:
+
+        """
+        try:
+            bucket_metadata = async_client.fetch_buckets_metadata(self._kbc_root_url, self._storage_token,
+                                                                  bucket_ids, TABLE_INCLUDE,
+                                                                  max_concurrency=max_concurrency, cache=cache)
+        except Exception as e:
+            logging.warning(f'Failed to prefetch bucket metadata asynchronously, '
+                            f'falling back to the synchronous client: {e}')
+            return
+
+        for bucket_id, (bucket_detail, tables) in bucket_metadata.items():
+            self._bucket_details[bucket_id] = bucket_detail
+            self._bucket_tables[bucket_id] = tables
+        if len(bucket_metadata) < len(bucket_ids):
+            logging.warning(f'Metadata of {len(bucket_ids) - len(bucket_metadata)} buckets will be loaded '
+                            f'by the synchronous client.')
+
+    def _get_bucket_detail(self, bucket_id: str) -> dict:
+        if bucket_id not in self._bucket_details:
+            self._bucket_details[bucket_id] = self._sapi_client.buckets.detail(bucket_id)
+        return self._bucket_details[bucket_id]
+
+    def _list_bucket_tables(self, bucket_id: str) -> List[dict]:
+        if bucket_id not in self._bucket_tables:
+            self._bucket_tables[bucket_id] = self._sapi_client.buckets.list_tables(bucket_id, include=TABLE_INCLUDE)
+        return self._bucket_tables[bucket_id]
+
+    def log_warehouse_free_summary(self):
+        self._snowflake_client.log_warehouse_free_summary()
+
+    def get_bucket_details(self, bucket_ids: List[str]) -> Dict[str, dict]:
+        return {bucket_id: self._get_bucket_detail(bucket_id) for bucket_id in bucket_ids}
+
+    def _get_resolved_table_columns(self, table: dict) -> Dict[str, StorageDataType]:
+        if table['id'] not in self._table_columns:
+            self._table_columns[table['id']] = self._get_table_columns(table)
+        return self._table_columns[table['id']]
+
+    @contextmanager
+    def shared_session(self, credentials: Credentials = None):
+        """
+        Keeps a single Snowflake session open for all create_views_from_bucket calls within the context.
+        Args:
+            credentials: Credentials of the session, defaults to the credentials of the ViewCreator
+
+        Returns:
+
+        """
+        credentials = credentials or self.__snowflake_credentials
+        with self._snowflake_client.connect(credentials):
+            self._session_ids.append(self._snowflake_client.session_id)
+            if credentials.role:
+                self._snowflake_client.use_role(credentials.role)
+            if credentials.warehouse_free:
+                self._snowflake_client.read_warehouse_state(credentials.warehouse)
+            self._shared_session = True
+            try:
+                yield self
+            finally:
+                self._shared_session = False
+
+    @contextmanager
+    def _bucket_session(self, query_tag: str = None):
+        if self._shared_session:
+            if query_tag:
+                self._snowflake_client.set_query_tag(query_tag)
+            yield
+            return
+
+        session_parameters = None
+        if query_tag:
+            session_parameters = {
+                'QUERY_TAG': query_tag
+            }
+        with self._snowflake_client.connect(self.__snowflake_credentials, session_parameters=session_parameters):
+            self._session_ids.append(self._snowflake_client.session_id)
+            if self.__snowflake_credentials.role:
+                self._snowflake_client.use_role(self.__snowflake_credentials.role)
+            yield
+
     def validate_schema_names(self, bucket_ids: List[str], use_bucket_alias: bool, drop_stage_prefix: bool,
                               schema_mapping: List[SchemaMapping] = None):
         """
@@ -149,7 +343,7 @@ class ViewCreator:
         Returns:
 
         """
-        bucket_details = [self._sapi_client.buckets.detail(bucket_id) for bucket_id in bucket_ids]
+        bucket_details = [self._get_bucket_detail(bucket_id) for bucket_id in bucket_ids]
         schema_names = [self._get_destination_schema_name(bd, use_bucket_alias, drop_stage_prefix, schema_mapping) for
                         bd in
                         bucket_details]
@@ -173,7 +367,14 @@ class ViewCreator:
                                  use_table_alias: bool = False,
                                  session_id: str = '',
                                  skip_shared_tables: bool = True,
-                                 schema_mapping: List[SchemaMapping] = None):
+                                 schema_mapping: List[SchemaMapping] = None,
+                                 tag_tables: bool = False,
+                                 checkpoint: RunCheckpoint = None,
+                                 materialization_rules: List[MaterializationRule] = None,
+                                 projection_mode: str = PROJECTION_CAST,
+                                 table_filter: NameFilter = NameFilter(),
+                                 column_filter: NameFilter = NameFilter(),
+                                 scheduler: RunScheduler = None):
         """
         Creates views with datatypes for all tables in the bucket.
         Args:
@@ -195,44 +396,154 @@ class ViewCreator:
             drop_stage_prefix: drop bucket stage prefix from schema name
             schema_mapping: List[SchemaMapping]: List of bucket/schema mappings.
                                                  If specified, other schema related parameters are ignored.
-
-        Returns:
+            tag_tables: bool: Extend the query tag of each view statement with the table ID
+                              so the statements can be joined to views in the query history
+            checkpoint: RunCheckpoint: If specified, already processed tables are skipped and failures
+                                       of particular tables are recorded instead of raised
+            materialization_rules: List[MaterializationRule]: The first rule matching the table ID defines
+                                   how the table is materialized. Plain view is created if none matches.
+            projection_mode: str: 'cast' to cast all columns to the metadata types,
+                                  'pruning' to keep bare column references where the cast is a no-op
+            table_filter: NameFilter: Only tables with matching table ID are processed, all by default
+            column_filter: NameFilter: Only matching columns are included in the views, all by default
+            scheduler: RunScheduler: If specified, the deadline is checked before each view and the latency
+                                     of the views is recorded. Remaining views of the bucket are deferred
+                                     once the deadline would be exceeded.
+
+        Returns: Number of views processed (created or failed)
 
         """
-        tables_resp = self._sapi_client.buckets.list_tables(bucket_id, include=['columns', 'columnMetadata'])
-
-        session_parameters = None
-        if session_id:
-            session_parameters = {
-                'QUERY_TAG': f'{{"runId":"{session_id}"}}'
-            }
-        with self._snowflake_client.connect(self.__snowflake_credentials, session_parameters=session_parameters):
-            if self.__snowflake_credentials.role:
-                self._snowflake_client.use_role(self.__snowflake_credentials.role)
-            bucket_detail = self._sapi_client.buckets.detail(bucket_id)
-
-            # skip shared buckets if requested
-            if bucket_detail.get('sourceBucket') and skip_shared_tables:
-                return
-
+        bucket_detail = self._get_bucket_detail(bucket_id)
+
+        # skip shared buckets if requested
+        if bucket_detail.get('sourceBucket') and skip_shared_tables:
+            return 0
+
+        # tables are selected before the session is used, so buckets without tables to process cost no statement
+        bucket_tables = self._list_bucket_tables(bucket_id)
+        tables_resp = self._select_tables(bucket_tables, destination_database, checkpoint, table_filter,
+                                          column_filter)
+        if bucket_tables and not tables_resp:
+            return 0
+        if scheduler and not scheduler.can_start(destination_database, bucket_id, len(tables_resp)):
+            return 0
+
+        query_tag = self._build_query_tag(session_id, bucket_id, destination_database) if session_id else None
+        with self._bucket_session(query_tag):
             destination_schema = self._get_destination_schema_name(bucket_detail, use_bucket_alias, drop_stage_prefix,
                                                                    schema_mapping)
 
             self._snowflake_client.create_if_not_exist_schema(destination_database,
                                                               self._convert_case(destination_schema, schema_name_case))
+            processed_views = 0
             for table in tables_resp:
+                if scheduler and not scheduler.can_start_view(destination_database, bucket_id):
+                    break
                 # update tale def according to alias
                 source_table = self._handle_alias(table)
                 # skip shared tables if requested
                 if source_table.get('is_shared') and skip_shared_tables:
                     continue
 
-                table_columns = self._get_table_columns(table)
+                table_columns = self._get_resolved_table_columns(table)
+
+                processed_views += 1
+                view_start = time.monotonic()
+                try:
+                    if session_id and tag_tables:
+                        self._snowflake_client.set_query_tag(self._build_query_tag(session_id, bucket_id,
+                                                                                   destination_database,
+                                                                                   table['id']))
+
+                    self._create_view_in_external_db(bucket_detail, destination_schema, table, source_table,
+                                                     table_columns, destination_database,
+                                                     schema_name_case, view_name_case, column_name_case,
+                                                     use_table_alias,
+                                                     self._get_materialization_rule(table['id'],
+                                                                                    materialization_rules),
+                                                     projection_mode)
+                except Exception as e:
+                    if not checkpoint:
+                        raise
+                    logging.warning(f'Failed to create view for table {table["id"]}, '
+                                    f'it will be retried at the end of the run: {e}')
+                    checkpoint.mark_table_failed(destination_database, table['id'], bucket_id)
+                    continue
+                finally:
+                    if scheduler:
+                        scheduler.record(time.monotonic() - view_start, 1)
+
+                if checkpoint:
+                    checkpoint.mark_table_done(destination_database, table['id'])
+
+        return processed_views
+
+    @staticmethod
+    def _select_tables(tables: List[dict], destination_database: str, checkpoint: RunCheckpoint = None,
+                       table_filter: NameFilter = NameFilter(),
+                       column_filter: NameFilter = NameFilter()) -> List[dict]:
+        """
+        Returns tables to be processed: tables matching the table filter, not yet processed according
+        to the checkpoint and with at least one column left after the column filter.
+        """
+        selected_tables = []
+        for table in tables:
+            if not table_filter.matches(table['id']):
+                continue
+            if checkpoint and checkpoint.is_table_done(destination_database, table['id']):
+                continue
+            if not column_filter.is_empty:
+                table['columns'] = [c for c in table['columns'] if column_filter.matches(c)]
+                if not table['columns']:
+                    logging.warning(f'All columns of table {table["id"]} are excluded by the column filter, '
+                                    f'skipping.')
+                    continue
+            selected_tables.append(table)
+        return selected_tables
+
+    @staticmethod
+    def _build_query_tag(session_id: str, bucket_id: str, destination_database: str, table_id: str = None) -> str:
+        query_tag = {'runId': session_id, 'bucketId': bucket_id, 'database': destination_database}
+        if table_id:
+            query_tag['tableId'] = table_id
+        return json.dumps(query_tag, separators=(',', ':'))
+
+    def get_query_timing_report(self, session_id: str, database: str, start_time: str,
+                                limit: int = 20) -> QueryTimingReport:
+        """
+        Collects server-side timing of all statements of the run from the query history of the sessions
+        used to create the views and joins them to the created views.
+        Args:
+            session_id: runId used in the query tag
+            database: Database used to resolve INFORMATION_SCHEMA
+            start_time: ISO formatted timestamp of the run start
+            limit: Number of slowest views to report
 
-                self._create_view_in_external_db(bucket_detail, destination_schema, table, source_table, table_columns,
-                                                 destination_database,
-                                                 schema_name_case, view_name_case, column_name_case,
-                                                 use_table_alias)
+        Returns:
+
+        """
+        query_history = []
+        with self._snowflake_client.connect(self.__snowflake_credentials):
+            if self.__snowflake_credentials.role:
+                self._snowflake_client.use_role(self.__snowflake_credentials.role)
+            # without known sessions, the whole query history of the user is scanned
+            for snowflake_session_id in self._session_ids or [None]:
+                rows = self._snowflake_client.get_query_history_by_run_id(database, session_id, start_time,
+                                                                          QUERY_HISTORY_RESULT_LIMIT,
+                                                                          snowflake_session_id)
+                if rows and rows[0]['SCANNED_ROWS'] >= QUERY_HISTORY_RESULT_LIMIT:
+                    logging.warning(f'The query history of session {snowflake_session_id} exceeds '
+                                    f'{QUERY_HISTORY_RESULT_LIMIT} statements, the timing report is incomplete.')
+                query_history.extend(rows)
+        return build_query_timing_report(query_history, self._created_views, limit)
+
+    @staticmethod
+    def _get_materialization_rule(table_id: str,
+                                  materialization_rules: List[MaterializationRule] = None) -> MaterializationRule:
+        for rule in materialization_rules or []:
+            if fnmatch.fnmatchcase(table_id, rule.table_pattern):
+                return rule
+        return None
 
     def _handle_alias(self, table: dict):
         """
@@ -290,7 +601,9 @@ class ViewCreator:
                                     schema_name_case: str = 'original',
                                     view_name_case: str = 'original',
                                     column_name_case: str = 'original',
-                                    use_table_alias: bool = False):
+                                    use_table_alias: bool = False,
+                                    materialization_rule: MaterializationRule = None,
+                                    projection_mode: str = PROJECTION_CAST):
         """
 
         Args:
@@ -304,18 +617,21 @@ class ViewCreator:
             schema_name_case:
             column_name_case:
             use_table_alias: Use user defined table name
+            materialization_rule: If specified, defines whether a view, dynamic table or materialized view is created
+            projection_mode: 'cast' or 'pruning'
 
         Returns:
 
         """
         column_definitions = self._build_column_definitions(table_columns, column_name_case,
-                                                            table.get('isTyped', False))
+                                                            self._is_native_typed(table), projection_mode,
+                                                            self._get_native_column_types(table))
         bucket_id = bucket_detail['id']
         # use display or default name
         destination_table_name = table['displayName'] if use_table_alias else table['name']
-        destination_table = f'"{destination_database}"' \
-                            f'."{self._convert_case(destination_schema_name, schema_name_case)}"' \
-                            f'."{self._convert_case(destination_table_name, view_name_case)}"'
+        schema_name = self._convert_case(destination_schema_name, schema_name_case)
+        view_name = self._convert_case(destination_table_name, view_name_case)
+        destination_table = f'"{destination_database}"."{schema_name}"."{view_name}"'
 
         source_table_id = f'"{bucket_id}"."{table["name"]}"'
         source_project_id = self._project_id
@@ -325,10 +641,55 @@ class ViewCreator:
             source_project_id = source_table['project']['id']
 
         source_table_identifier = f'"{self.get_project_db_name(source_project_id)}".{source_table_id}'
-        columns_definition = f'{column_definitions}, "_timestamp"::TIMESTAMP AS "_timestamp"'
-
-        self._snowflake_client.create_or_replace_view(destination_table, columns_definition, source_table_identifier,
-                                                      True)
+        timestamp_expression = '"_timestamp"' if projection_mode == PROJECTION_PRUNING else '"_timestamp"::TIMESTAMP'
+        columns_definition = f'{column_definitions}, {timestamp_expression} AS "_timestamp"'
+
+        materialization = materialization_rule.materialization if materialization_rule else None
+        if materialization == MATERIALIZATION_DYNAMIC_TABLE:
+            object_kind = OBJECT_KIND_DYNAMIC_TABLE
+            target_lag = materialization_rule.target_lag.strip()
+            warehouse = materialization_rule.warehouse or self.__snowflake_credentials.warehouse
+            # replacing the dynamic table drops the materialized data and reinitializes it on the warehouse
+            is_unchanged = functools.partial(self._snowflake_client.is_dynamic_table_unchanged,
+                                             destination_database, schema_name, view_name, columns_definition,
+                                             source_table_identifier, target_lag, warehouse)
+            create_function = functools.partial(self._snowflake_client.create_or_replace_dynamic_table,
+                                                destination_table, columns_definition, source_table_identifier,
+                                                target_lag, warehouse, True)
+        elif materialization == MATERIALIZATION_MATERIALIZED_VIEW:
+            object_kind = OBJECT_KIND_MATERIALIZED_VIEW
+            is_unchanged = functools.partial(self._snowflake_client.is_materialized_view_unchanged,
+                                             destination_database, schema_name, view_name, columns_definition,
+                                             source_table_identifier)
+            create_function = functools.partial(self._snowflake_client.create_or_replace_materialized_view,
+                                                destination_table, columns_definition, source_table_identifier,
+                                                True)
+        else:
+            object_kind = OBJECT_KIND_VIEW
+            # views are metadata only, replacing is cheaper than the lookup
+            is_unchanged = None
+            create_function = functools.partial(self._snowflake_client.create_or_replace_view,
+                                                destination_table, columns_definition, source_table_identifier,
+                                                True)
+
+        if is_unchanged and is_unchanged():
+            logging.info(f'{object_kind.capitalize()} {destination_table} is up to date, skipping.')
+            self._created_views[(destination_database, table['id'])] = destination_table
+            return
+
+        try:
+            create_function()
+        except snowflake_errors.ProgrammingError:
+            # CREATE OR REPLACE fails if the object exists with a different kind, e.g. when switching a view
+            # to a dynamic table. The existing object is only looked up on failure to save a round trip per view.
+            existing_kind = self._snowflake_client.get_object_kind(destination_database, schema_name, view_name)
+            if existing_kind == object_kind or existing_kind not in MANAGED_OBJECT_KINDS:
+                raise
+            logging.warning(f'{destination_table} exists as {existing_kind.lower()}, replacing it with '
+                            f'{object_kind.lower()}. Grants of the existing object are not copied.')
+            self._snowflake_client.drop_object(existing_kind, destination_table)
+            create_function()
+        self._created_views[(destination_database, table['id'])] = destination_table
 
     def get_project_db_name(self, project_id):
         return f'{self._system_name_prefix}{project_id}'
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer, unused_port
+
+from sapistorage.async_client import AsyncStorageMetadataClient
+from sapistorage.response_cache import MetadataResponseCache
+
+
+class StorageApiStub:
+
+    def __init__(self):
+        self.requests = []
+        self.last_change_date = '2024-01-01'
+        self.alias_buckets = []
+        # request path => failures returned before the request succeeds: 'disconnect', 'slow' or a status code
+        self.failures = {}
+        self.slow_seconds = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/v2/storage/buckets', self.list_buckets)
+        app.router.add_get('/v2/storage/buckets/{bucket_id}', self.bucket_detail)
+        app.router.add_get('/v2/storage/buckets/{bucket_id}/tables', self.list_tables)
+        return app
+
+    async def list_buckets(self, request):
+        self.requests.append(request.path)
+        return web.json_response([{'id': 'in.c-a', 'lastChangeDate': self.last_change_date},
+                                  {'id': 'in.c-b', 'lastChangeDate': self.last_change_date}])
+
+    async def bucket_detail(self, request):
+        self.requests.append(request.path)
+        failures = self.failures.get(request.path)
+        if failures:
+            failure = failures.pop(0)
+            if failure == 'disconnect':
+                request.transport.close()
+            elif failure == 'slow':
+                await asyncio.sleep(self.slow_seconds)
+            else:
+                return web.Response(status=failure)
+        return web.json_response({'id': request.match_info['bucket_id']})
+
+    async def list_tables(self, request):
+        self.requests.append(request.path)
+        bucket_id = request.match_info['bucket_id']
+        is_alias = bucket_id in self.alias_buckets
+        etag = '"v1-alias"' if is_alias else '"v1"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        return web.json_response([{'id': bucket_id + '.t', 'isAlias': is_alias,
+                                   'include': request.query.get('include')}], headers={'ETag': etag})
+
+
+class TestAsyncStorageMetadataClient(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StorageApiStub()
+        # cache keys contain the root url, keep the same port for all requests of the test
+        self.port = unused_port()
+
+    def _fetch(self, cache: MetadataResponseCache = None, **client_options) -> dict:
+        async def _run():
+            async with TestServer(self.stub.app(), port=self.port) as server:
+                root_url = str(server.make_url('')).rstrip('/')
+                async with AsyncStorageMetadataClient(root_url, 'token', cache=cache, **client_options) as client:
+                    return await client.fetch_buckets_metadata(['in.c-a', 'in.c-b'], ['columns', 'columnMetadata'])
+
+        return asyncio.run(_run())
+
+    def test_fetch_buckets_metadata_returns_detail_and_tables_per_bucket(self):
+        result = self._fetch()
+
+        self.assertEqual(['in.c-a', 'in.c-b'], list(result.keys()))
+        detail, tables = result['in.c-b']
+        self.assertEqual({'id': 'in.c-b'}, detail)
+        self.assertEqual([{'id': 'in.c-b.t', 'isAlias': False, 'include': 'columns,columnMetadata'}], tables)
+
+    def test_connection_errors_and_timeouts_are_retried_without_blocking_other_requests(self):
+        self.stub.failures = {'/v2/storage/buckets/in.c-a': ['disconnect'], '/v2/storage/buckets/in.c-b': ['slow']}
+        self.stub.slow_seconds = 1
+
+        result = self._fetch(max_concurrency=1, request_timeout=0.2)
+
+        self.assertEqual({'id': 'in.c-a'}, result['in.c-a'][0])
+        self.assertEqual({'id': 'in.c-b'}, result['in.c-b'][0])
+        # the semaphore is released during the backoff, so the other requests are not delayed by the retry
+        self.assertEqual(['/v2/storage/buckets/in.c-b/tables', '/v2/storage/buckets/in.c-b'],
+                         self.stub.requests[-2:])
+        self.assertEqual(2, self.stub.requests.count('/v2/storage/buckets/in.c-a'))
+
+    def test_failed_bucket_is_left_out_of_the_result(self):
+        self.stub.failures = {'/v2/storage/buckets/in.c-b': [404]}
+
+        with self.assertLogs(level='WARNING') as logs:
+            result = self._fetch()
+
+        self.assertEqual(['in.c-a'], list(result.keys()))
+        self.assertIn('in.c-b', logs.output[0])
+
+    def test_cache_skips_unchanged_buckets_and_revalidates_changed(self):
+        cache = MetadataResponseCache()
+        first = self._fetch(cache)
+        # returned objects may be modified by the caller without affecting the cache
+        first['in.c-a'][1][0]['id'] = 'modified'
+
+        state = {}
+        cache.save_to_state(state)
+        cache = MetadataResponseCache()
+        cache.load_from_state(state)
+
+        self.stub.requests.clear()
+        second = self._fetch(cache)
+        self.assertEqual(['/v2/storage/buckets'], self.stub.requests)
+        self.assertEqual('in.c-a.t', second['in.c-a'][1][0]['id'])
+
+        self.stub.requests.clear()
+        self.stub.last_change_date = '2024-01-02'
+        third = self._fetch(cache)
+        self.assertEqual(5, len(self.stub.requests))
+        self.assertEqual(second, third)
+
+    def test_cache_revalidates_alias_tables_and_expired_entries(self):
+        self.stub.alias_buckets = ['in.c-b']
+        cache = MetadataResponseCache(max_age_seconds=60)
+        self._fetch(cache)
+
+        self.stub.requests.clear()
+        self._fetch(cache)
+        self.assertEqual(['/v2/storage/buckets', '/v2/storage/buckets/in.c-b/tables'], self.stub.requests)
+
+        self.stub.alias_buckets = []
+        for entry in cache._entries.values():
+            entry.validated_at = time.time() - 120
+        self.stub.requests.clear()
+        self._fetch(cache)
+        self.assertEqual(5, len(self.stub.requests))
+
+        # revalidated entries are fresh again
+        self.stub.requests.clear()
+        self._fetch(cache)
+        self.assertEqual(['/v2/storage/buckets'], self.stub.requests)
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = MetadataResponseCache(max_size_bytes=30)
+        cache.put('a', {'value': 'a' * 10})
+        cache.put('b', {'value': 'b' * 10})
+        cache.get('a')
+
+        state = {}
+        cache.save_to_state(state)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+
+
+if __name__ == "__main__":
+    unittest.main()
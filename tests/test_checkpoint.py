@@ -0,0 +1,46 @@
+import unittest
+
+from checkpoint import RunCheckpoint
+
+
+class TestRunCheckpoint(unittest.TestCase):
+
+    def test_resumes_with_same_plan_and_restarts_with_changed_plan(self):
+        written = []
+        checkpoint = RunCheckpoint({'other': 1}, 'plan-a', written.append)
+        checkpoint.mark_table_done('DB', 'in.c-a.t1')
+        checkpoint.mark_table_failed('DB', 'in.c-a.t2', 'in.c-a')
+        checkpoint.mark_bucket_done('DB', 'in.c-a')
+        checkpoint.mark_table_done('DB', 'in.c-b.t1')
+        checkpoint.mark_bucket_done('DB', 'in.c-b')
+        checkpoint.mark_table_done('DB2', 'in.c-a.t1')
+        # the state is written once at the end of the run
+        self.assertEqual([], written)
+        checkpoint.save()
+
+        state = written[-1]
+        self.assertEqual(3, checkpoint.created_views)
+        self.assertEqual(1, state['other'])
+
+        resumed = RunCheckpoint(state, 'plan-a', written.append)
+        self.assertFalse(resumed.is_bucket_done('DB', 'in.c-a'))
+        self.assertTrue(resumed.is_table_done('DB', 'in.c-a.t1'))
+        self.assertTrue(resumed.is_bucket_done('DB', 'in.c-b'))
+        self.assertFalse(resumed.is_bucket_done('DB2', 'in.c-b'))
+        self.assertTrue(resumed.is_table_done('DB2', 'in.c-a.t1'))
+        self.assertEqual([('DB', 'in.c-a')], resumed.get_failed_buckets())
+
+        restarted = RunCheckpoint(state, 'plan-b', written.append)
+        self.assertFalse(restarted.is_bucket_done('DB', 'in.c-b'))
+        self.assertEqual({}, restarted.failed_tables)
+
+    def test_clear_removes_checkpoint_only(self):
+        written = []
+        checkpoint = RunCheckpoint({'other': 1, 'checkpoint': {'plan_hash': 'x'}}, 'x', written.append)
+        checkpoint.clear()
+
+        self.assertEqual({'other': 1}, written[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,27 @@ Created on 12. 11. 2018
 
 @author: esner
 '''
+import json
+import os
+import tempfile
 import unittest
+
 import mock
-import os
 from freezegun import freeze_time
 
+from keboola.component.exceptions import UserException
+
 from component import Component
+from scheduler import RunScheduler
+
+TABLES = {
+    'in.c-a': [{'id': 'in.c-a.t1', 'name': 't1', 'displayName': 't1', 'isAlias': False, 'columns': ['id'],
+                'columnMetadata': []},
+               {'id': 'in.c-a.t2', 'name': 't2', 'displayName': 't2', 'isAlias': False, 'columns': ['id'],
+                'columnMetadata': []}],
+    'in.c-b': [{'id': 'in.c-b.t3', 'name': 't3', 'displayName': 't3', 'isAlias': False, 'columns': ['id'],
+                'columnMetadata': []}]
+}
 
 
 class TestComponent(unittest.TestCase):
@@ -22,6 +37,118 @@ class TestComponent(unittest.TestCase):
             comp = Component()
             comp.run()
 
+    def _run(self, parameters: dict, failing_statement: str = None, failures: int = 0, state: dict = None,
+             deferred_bucket: str = None):
+        """
+        Runs the component against mocked Storage API and Snowflake connections.
+        Statements containing failing_statement fail the given number of times.
+        Views of the deferred_bucket are deferred as if the run deadline was reached.
+
+        Returns: executed statements, snowflake.connector.connect mock, written state (None if not written)
+
+        """
+        data_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(data_dir, 'in'))
+        os.makedirs(os.path.join(data_dir, 'out'))
+        with open(os.path.join(data_dir, 'config.json'), 'w') as config_file:
+            json.dump({'parameters': {'account': 'acc', 'username': 'user', '#password': 'pass',
+                                      'auth_type': 'password', 'warehouse': 'WH', 'role': 'ROLE',
+                                      'bucket_ids': ['in.c-a', 'in.c-b'],
+                                      'additional_options': {'async_metadata_fetch': False}, **parameters},
+                       'action': 'run'}, config_file)
+        if state is not None:
+            with open(os.path.join(data_dir, 'in', 'state.json'), 'w') as state_file:
+                json.dump(state, state_file)
+
+        statements = []
+        remaining_failures = [failures]
+
+        def execute(query):
+            statements.append(query)
+            if failing_statement and failing_statement in query and remaining_failures[0]:
+                remaining_failures[0] -= 1
+                raise RuntimeError('view creation failed')
+            return mock.MagicMock(fetchall=lambda: [])
+
+        def can_start_view(scheduler, destination, bucket_id):
+            if bucket_id != deferred_bucket:
+                return True
+            scheduler.deferred.append((destination, bucket_id))
+            return False
+
+        connection = mock.MagicMock()
+        connection.cursor.return_value.execute.side_effect = execute
+        environment = {'KBC_DATADIR': data_dir, 'KBC_RUNID': '1', 'KBC_PROJECTID': '123',
+                       'KBC_STACKID': 'connection.keboola.com', 'KBC_TOKEN': 'token'}
+        with mock.patch.dict(os.environ, environment), \
+                mock.patch('snowflake.connector.connect', return_value=connection) as connect, \
+                mock.patch('kbcstorage.buckets.Buckets.detail',
+                           side_effect=lambda b: {'id': b, 'stage': 'in', 'displayName': b[5:]}), \
+                mock.patch('kbcstorage.buckets.Buckets.list_tables',
+                           side_effect=lambda b, include=None: json.loads(json.dumps(TABLES[b]))), \
+                mock.patch.object(RunScheduler, 'can_start_view', autospec=True, side_effect=can_start_view):
+            Component().run()
+
+        state_path = os.path.join(data_dir, 'out', 'state.json')
+        if not os.path.exists(state_path):
+            return statements, connect, None
+        with open(state_path) as state_file:
+            return statements, connect, json.load(state_file)
+
+    def _created_views(self, statements: list) -> list:
+        return [s.split(' ')[4] for s in statements if s.startswith('CREATE OR REPLACE VIEW')]
+
+    def test_failed_table_is_retried_at_the_end_of_the_run(self):
+        statements, _, state = self._run({'destination_db': 'DB'}, '"DB"."in_a"."t2"', failures=1)
+
+        self.assertEqual(['"DB"."in_a"."t1"', '"DB"."in_a"."t2"', '"DB"."in_b"."t3"', '"DB"."in_a"."t2"'],
+                         self._created_views(statements))
+        self.assertNotIn('checkpoint', state)
+
+    def test_table_failing_after_retry_fails_the_run_and_next_run_starts_from_beginning(self):
+        with self.assertRaises(UserException) as error:
+            self._run({'destination_db': 'DB'}, '"DB"."in_a"."t2"', failures=100)
+        self.assertIn('DB/in.c-a.t2', str(error.exception))
+
+        # the state of a failed job is not kept, even if it was written the next run must process all tables
+        statements, _, state = self._run({'destination_db': 'DB'}, state={})
+        self.assertEqual(['"DB"."in_a"."t1"', '"DB"."in_a"."t2"', '"DB"."in_b"."t3"'],
+                         self._created_views(statements))
+        self.assertNotIn('checkpoint', state)
+
+    def test_run_without_any_created_view_fails(self):
+        with self.assertRaises(UserException):
+            self._run({'destination_db': 'DB'}, 'CREATE OR REPLACE VIEW', failures=100, deferred_bucket='in.c-b')
+
+    def test_run_stopped_by_deadline_is_resumed_with_failed_tables_first(self):
+        statements, _, state = self._run({'destination_db': 'DB'}, '"DB"."in_a"."t2"', failures=2,
+                                         deferred_bucket='in.c-b')
+        self.assertEqual(['"DB"."in_a"."t1"', '"DB"."in_a"."t2"', '"DB"."in_a"."t2"'],
+                         self._created_views(statements))
+        self.assertEqual({'DB/in.c-a.t2': ['DB', 'in.c-a']}, state['checkpoint']['failed_tables'])
+
+        statements, _, state = self._run({'destination_db': 'DB'}, state=state)
+        self.assertEqual(['"DB"."in_a"."t2"', '"DB"."in_b"."t3"'], self._created_views(statements))
+        self.assertNotIn('checkpoint', state)
+
+        # the run processed all tables, the next one starts from the beginning
+        statements, _, state = self._run({'destination_db': 'DB'}, state=state)
+        self.assertEqual(['"DB"."in_a"."t1"', '"DB"."in_a"."t2"', '"DB"."in_b"."t3"'],
+                         self._created_views(statements))
+
+    def test_destinations_sharing_credentials_share_one_session(self):
+        statements, connect, state = self._run({'destination_db': [{'database': 'A'},
+                                                                   {'database': 'B', 'view_case': 'upper'},
+                                                                   {'database': 'C', 'role': 'OTHER_ROLE'}]})
+
+        self.assertEqual(['ROLE', 'OTHER_ROLE'], [c.kwargs['role'] for c in connect.call_args_list])
+        self.assertEqual(['USE ROLE ROLE;', 'USE ROLE OTHER_ROLE;'], [s for s in statements if s.startswith('USE')])
+        view_names = self._created_views(statements)
+        self.assertEqual(['"A"."in_a"."t1"', '"A"."in_a"."t2"', '"B"."in_a"."T1"', '"B"."in_a"."T2"',
+                          '"A"."in_b"."t3"', '"B"."in_b"."T3"',
+                          '"C"."in_a"."t1"', '"C"."in_a"."t2"', '"C"."in_b"."t3"'], view_names)
+        self.assertNotIn('checkpoint', state)
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,41 @@
+import unittest
+
+from keboola.component.exceptions import UserException
+
+from configuration import Configuration
+
+
+class TestConfiguration(unittest.TestCase):
+
+    def test_single_destination_db(self):
+        cfg = Configuration.load_from_dict({'destination_db': 'DB', 'additional_options': {'view_case': 'upper'}})
+
+        destinations = cfg.get_destinations()
+
+        self.assertEqual(['DB'], [d.database for d in destinations])
+        self.assertEqual('upper', destinations[0].view_case)
+        self.assertTrue(destinations[0].use_bucket_alias)
+
+    def test_destination_list_inherits_unset_options(self):
+        cfg = Configuration.load_from_dict({
+            'destination_db': [{'database': 'ANALYTICS'},
+                               {'database': 'SANDBOX', 'column_case': 'lower', 'use_bucket_alias': False,
+                                'role': 'SANDBOX_ROLE'}],
+            'additional_options': {'column_case': 'upper'}})
+
+        analytics, sandbox = cfg.get_destinations()
+
+        self.assertEqual('upper', analytics.column_case)
+        self.assertTrue(analytics.use_bucket_alias)
+        self.assertEqual('lower', sandbox.column_case)
+        self.assertFalse(sandbox.use_bucket_alias)
+        self.assertEqual('SANDBOX_ROLE', sandbox.role)
+
+    def test_missing_or_duplicate_destinations_fail(self):
+        for destination_db in ['', [], [{'database': 'A'}, {'database': 'A'}]]:
+            with self.subTest(destination_db=destination_db), self.assertRaises(UserException):
+                Configuration.load_from_dict({'destination_db': destination_db}).get_destinations()
+
+
+if __name__ == "__main__":
+    unittest.main()
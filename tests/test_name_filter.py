@@ -0,0 +1,40 @@
+import unittest
+
+from keboola.component.exceptions import UserException
+
+from name_filter import NameFilter
+
+
+class TestNameFilter(unittest.TestCase):
+
+    def test_empty_filter_matches_everything(self):
+        name_filter = NameFilter()
+
+        self.assertTrue(name_filter.is_empty)
+        self.assertTrue(name_filter.matches('in.c-a.orders'))
+
+    def test_include_and_exclude_globs_and_regex(self):
+        name_filter = NameFilter(include=['in.c-sales.*', 're:out\\.c-[a-z]+\\.report_\\d+'],
+                                 exclude=['*_snapshot', 're:.*\\.stg_.*'])
+
+        self.assertTrue(name_filter.matches('in.c-sales.orders'))
+        self.assertTrue(name_filter.matches('out.c-bi.report_2024'))
+        self.assertFalse(name_filter.matches('in.c-sales.orders_snapshot'))
+        self.assertFalse(name_filter.matches('in.c-sales.stg_orders'))
+        self.assertFalse(name_filter.matches('in.c-marketing.orders'))
+        # patterns match the whole name
+        self.assertFalse(name_filter.matches('out.c-bi.report_2024_old'))
+
+    def test_exclude_only(self):
+        name_filter = NameFilter(exclude=['_*'])
+
+        self.assertTrue(name_filter.matches('id'))
+        self.assertFalse(name_filter.matches('_private'))
+
+    def test_invalid_regex_fails(self):
+        with self.assertRaises(UserException):
+            NameFilter(include=['re:('])
+
+
+if __name__ == "__main__":
+    unittest.main()
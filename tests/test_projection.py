@@ -0,0 +1,124 @@
+"""
+Golden SQL tests of the generated view projections.
+
+A column is prunable when it is projected as a bare column reference, i.e. `"col" AS "col"`,
+so filters on the view column are pushed down to the source table as is.
+"""
+import unittest
+
+from dbstorage.snowflake_client import Credentials
+from view_creator import ViewCreator
+
+
+def _md(basetype, length=None, nullable=None, provider='user'):
+    metadata = [{'key': 'KBC.datatype.basetype', 'value': basetype, 'provider': provider}]
+    if length:
+        metadata.append({'key': 'KBC.datatype.length', 'value': length, 'provider': provider})
+    if nullable is not None:
+        metadata.append({'key': 'KBC.datatype.nullable', 'value': nullable, 'provider': provider})
+    return metadata
+
+
+STRING_TABLE = {
+    'columns': ['id', 'name', 'code', 'amount', 'created', 'note'],
+    'columnMetadata': {
+        'id': _md('STRING'),
+        'name': _md('STRING', nullable=True),
+        'code': _md('STRING', length='10'),
+        'amount': _md('NUMERIC', length='12,2'),
+        'created': _md('DATE'),
+    }
+}
+
+TYPED_DEFINITION = {
+    'columns': [
+        {'name': 'id', 'basetype': 'INTEGER', 'definition': {'type': 'NUMBER', 'length': '38,0'}},
+        {'name': 'amount', 'basetype': 'NUMERIC', 'definition': {'type': 'NUMBER', 'length': '12,2'}},
+        {'name': 'created', 'basetype': 'STRING', 'definition': {'type': 'VARCHAR'}},
+    ]
+}
+
+TYPED_TABLE = {
+    'columns': ['id', 'amount', 'created'],
+    'columnMetadata': {
+        'id': _md('INTEGER', provider='storage'),
+        'amount': _md('NUMERIC', length='12,2', provider='storage'),
+        # user overrides the physical type
+        'created': _md('DATE'),
+    },
+    'definition': TYPED_DEFINITION
+}
+
+# (table, projection mode, golden SQL, prunable columns)
+GOLDEN = {
+    'string_table_cast': (
+        STRING_TABLE, 'cast',
+        '"id"::STRING AS "id",'
+        'NULLIF("name", \'\')::STRING AS "name",'
+        '"code"::STRING(10) AS "code",'
+        'NULLIF("amount", \'\')::NUMERIC(12,2) AS "amount",'
+        'NULLIF("created", \'\')::DATE AS "created",'
+        'NULLIF("note", \'\')::TEXT AS "note"',
+        []
+    ),
+    'string_table_pruning': (
+        STRING_TABLE, 'pruning',
+        '"id" AS "id",'
+        'NULLIF("name", \'\') AS "name",'
+        '"code"::STRING(10) AS "code",'
+        'TRY_CAST("amount" AS NUMERIC(12,2)) AS "amount",'
+        'TRY_CAST("created" AS DATE) AS "created",'
+        'NULLIF("note", \'\') AS "note"',
+        ['id']
+    ),
+    'typed_table_cast': (
+        TYPED_TABLE, 'cast',
+        '"id"::INTEGER AS "id",'
+        '"amount"::NUMERIC(12,2) AS "amount",'
+        '"created"::DATE AS "created"',
+        []
+    ),
+    'typed_table_pruning': (
+        TYPED_TABLE, 'pruning',
+        '"id" AS "id",'
+        '"amount" AS "amount",'
+        '"created"::DATE AS "created"',
+        ['id', 'amount']
+    ),
+}
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.view_creator = ViewCreator(Credentials(account='acc', user='user', warehouse='WH'),
+                                        'https://connection.keboola.com', 'token', '123')
+
+    def _build(self, table: dict, projection_mode: str) -> str:
+        vc = self.view_creator
+        return vc._build_column_definitions(vc._get_table_columns(table), 'original', vc._is_native_typed(table),
+                                            projection_mode, vc._get_native_column_types(table))
+
+    def test_golden_sql(self):
+        for case, (table, projection_mode, expected_sql, _) in GOLDEN.items():
+            with self.subTest(case):
+                self.assertEqual(expected_sql, self._build(table, projection_mode))
+
+    def test_prunable_columns(self):
+        for case, (table, projection_mode, _, prunable) in GOLDEN.items():
+            with self.subTest(case):
+                sql = self._build(table, projection_mode)
+                self.assertEqual(prunable, [c for c in table['columns'] if f'"{c}" AS "{c}"' in sql])
+
+    def test_typed_table_detected_without_is_typed_flag(self):
+        self.assertTrue(self.view_creator._is_native_typed({'definition': TYPED_DEFINITION}))
+        self.assertFalse(self.view_creator._is_native_typed({'isTyped': False}))
+        self.assertFalse(self.view_creator._is_native_typed({}))
+
+    def test_invalid_projection_mode_fails(self):
+        with self.assertRaises(ValueError):
+            self._build(STRING_TABLE, 'fast')
+
+
+if __name__ == "__main__":
+    unittest.main()
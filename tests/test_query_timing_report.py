@@ -0,0 +1,54 @@
+import unittest
+
+from query_timing_report import build_query_timing_report
+
+
+def _row(query_tag, total, compilation=0, queued=0, blocked=0, execution=0, query_type='CREATE_VIEW'):
+    return {'QUERY_TYPE': query_type, 'QUERY_TAG': query_tag, 'TOTAL_ELAPSED_TIME': total, 'COMPILATION_TIME': compilation,
+            'QUEUED_TIME': queued, 'TRANSACTION_BLOCKED_TIME': blocked, 'EXECUTION_TIME': execution}
+
+
+class TestQueryTimingReport(unittest.TestCase):
+
+    def test_report_joins_statements_to_views_by_table_id(self):
+        history = [
+            _row('{"runId":"1","bucketId":"in.c-a"}', 50, compilation=10),
+            _row('{"runId":"1","bucketId":"in.c-a","database":"DB","tableId":"in.c-a.t1"}', 100, compilation=40, queued=20),
+            _row('{"runId":"1","bucketId":"in.c-a","database":"DB","tableId":"in.c-a.t1"}', 5),
+            _row('{"runId":"1","bucketId":"in.c-a","database":"DB","tableId":"in.c-a.t2"}', 300, blocked=250),
+        ]
+        views = {('DB', 'in.c-a.t1'): '"DB"."in_a"."t1"', ('DB', 'in.c-a.t2'): '"DB"."in_a"."t2"'}
+
+        report = build_query_timing_report(history, views, limit=1)
+
+        self.assertEqual(4, report.statements)
+        self.assertEqual(455, report.total_elapsed_ms)
+        self.assertEqual(50, report.compilation_ms)
+        self.assertEqual(20, report.queued_ms)
+        self.assertEqual(250, report.blocked_ms)
+        self.assertEqual(['in.c-a.t2'], [v.table_id for v in report.slowest_views])
+
+    def test_report_separates_alter_session_statements(self):
+        tag = '{"runId":"1","bucketId":"in.c-a","database":"DB","tableId":"in.c-a.t1"}'
+        history = [
+            _row(tag, 30, query_type='ALTER_SESSION'),
+            _row(tag, 100),
+        ]
+
+        report = build_query_timing_report(history, {('DB', 'in.c-a.t1'): 'v'})
+
+        self.assertEqual(1, report.statements)
+        self.assertEqual(100, report.total_elapsed_ms)
+        self.assertEqual(1, report.alter_session_statements)
+        self.assertEqual(30, report.alter_session_ms)
+        self.assertEqual(100, report.slowest_views[0].total_elapsed_ms)
+
+    def test_report_ignores_untagged_statements(self):
+        report = build_query_timing_report([_row(None, 10), _row('not json', 10)], {('DB', 'in.c-a.t1'): 'v'})
+
+        self.assertEqual(2, report.statements)
+        self.assertEqual([], report.slowest_views)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import time
+import unittest
+
+from scheduler import RunScheduler
+
+
+class TestRunScheduler(unittest.TestCase):
+
+    def test_order_buckets(self):
+        details = {
+            'in.c-old': {'lastChangeDate': '2024-01-01T10:00:00+0100'},
+            'in.c-new': {'lastChangeDate': '2024-03-01T10:00:00+0100'},
+            'in.c-failed': {'lastChangeDate': '2023-01-01T10:00:00+0100'},
+            'in.c-prio': {'lastChangeDate': '2023-01-01T10:00:00+0100'},
+            'in.c-unknown': {},
+        }
+
+        ordered = RunScheduler.order_buckets(list(details), details, priority_bucket_ids=['in.c-prio'],
+                                             failed_bucket_ids=['in.c-failed'])
+
+        self.assertEqual(['in.c-prio', 'in.c-failed', 'in.c-new', 'in.c-old', 'in.c-unknown'], ordered)
+
+    def test_no_deadline_never_defers(self):
+        scheduler = RunScheduler()
+
+        self.assertTrue(scheduler.can_start('DB', 'in.c-a', 100000))
+        self.assertEqual([], scheduler.deferred)
+
+    def test_first_bucket_larger_than_deadline_is_started(self):
+        scheduler = RunScheduler(deadline_seconds=3600)
+
+        # nothing is measured yet, the first view is always started
+        self.assertTrue(scheduler.can_start('DB', 'in.c-large', 3001))
+        self.assertTrue(scheduler.can_start_view('DB', 'in.c-large'))
+        scheduler.record(1.0, 1)
+        self.assertTrue(scheduler.can_start_view('DB', 'in.c-large'))
+        self.assertEqual([], scheduler.deferred)
+
+    def test_defers_views_that_would_exceed_deadline(self):
+        scheduler = RunScheduler(deadline_seconds=100, start_time=time.monotonic() - 90)
+        scheduler.record(20, 10)
+
+        # bucket not fitting as a whole is started and processed partially
+        self.assertTrue(scheduler.can_start('DB', 'in.c-a', 30))
+        self.assertTrue(scheduler.can_start_view('DB', 'in.c-a'))
+
+        scheduler.record(100, 1)
+        self.assertFalse(scheduler.can_start_view('DB', 'in.c-a'))
+        self.assertFalse(scheduler.can_start('DB', 'in.c-b', 1))
+        self.assertTrue(scheduler.is_deferred('DB', 'in.c-a'))
+        self.assertEqual([('DB', 'in.c-a'), ('DB', 'in.c-b')], scheduler.deferred)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import mock
+
+from dbstorage.snowflake_client import SnowflakeClient
+
+
+class TestSnowflakeClient(unittest.TestCase):
+
+    def test_metadata_only_statements(self):
+        metadata_only = [
+            'USE ROLE MANAGE_ROLE;',
+            "ALTER SESSION SET QUERY_TAG = '{\"runId\":\"1\"}'",
+            'CREATE SCHEMA IF NOT EXISTS "DB"."in_c_a";',
+            'CREATE OR REPLACE VIEW "DB"."in_c_a"."t" COPY GRANTS AS SELECT "id" AS "id" FROM "KEBOOLA_1"."in.c-a"."t"',
+            'SELECT CURRENT_USER(), CURRENT_ROLE(), CURRENT_DATABASE();',
+            'SHOW SCHEMAS IN DATABASE "DB"',
+            'DROP VIEW IF EXISTS "DB"."in_c_a"."t"',
+        ]
+        compute = [
+            'CREATE OR REPLACE DYNAMIC TABLE "DB"."s"."t" TARGET_LAG = \'1 hour\' WAREHOUSE = WH AS SELECT 1',
+            'CREATE OR REPLACE MATERIALIZED VIEW "DB"."s"."t" AS SELECT "id" FROM "KEBOOLA_1"."in.c-a"."t"',
+            'SELECT QUERY_ID FROM TABLE("DB".INFORMATION_SCHEMA.QUERY_HISTORY())',
+            'SELECT CURRENT_USER(), COUNT(*) FROM "DB"."s"."t"',
+        ]
+        for query in metadata_only:
+            with self.subTest(query=query):
+                self.assertTrue(SnowflakeClient.is_metadata_only(query))
+        for query in compute:
+            with self.subTest(query=query):
+                self.assertFalse(SnowflakeClient.is_metadata_only(query))
+
+    def test_get_object_kind_matches_exact_name(self):
+        client = SnowflakeClient()
+        client.execute_query = mock.Mock(return_value=[
+            {'name': 'ORDERS', 'kind': 'TABLE', 'is_dynamic': 'N'},
+            {'name': 'orders', 'kind': 'TABLE', 'is_dynamic': 'Y'},
+            {'name': 'orders_mv', 'kind': 'MATERIALIZED_VIEW', 'is_dynamic': 'N'},
+        ])
+
+        self.assertEqual('DYNAMIC TABLE', client.get_object_kind('DB', 'in_a', 'orders'))
+        self.assertEqual('MATERIALIZED VIEW', client.get_object_kind('DB', 'in_a', 'orders_mv'))
+        self.assertIsNone(client.get_object_kind('DB', 'in_a', 'missing'))
+        client.execute_query.assert_called_with('SHOW OBJECTS LIKE \'missing\' IN SCHEMA "DB"."in_a"')
+
+    def test_dynamic_table_unchanged_compares_query_lag_and_warehouse(self):
+        client = SnowflakeClient()
+        text = ('create or replace dynamic table "DB"."s"."t" TARGET_LAG = \'1 hour\' WAREHOUSE = "WH" COPY GRANTS\n'
+                'AS SELECT "id" AS "id", "_timestamp" AS "_timestamp"\n  FROM "KEBOOLA_1"."in.c-a"."t"')
+        client.execute_query = mock.Mock(return_value=[{'name': 't', 'text': text, 'target_lag': '1 hour',
+                                                        'warehouse': 'WH'}])
+        args = ('DB', 's', 't', '"id" AS "id", "_timestamp" AS "_timestamp"', '"KEBOOLA_1"."in.c-a"."t"')
+
+        self.assertTrue(client.is_dynamic_table_unchanged(*args, '1 hour', 'WH'))
+        client.execute_query.assert_called_with('SHOW DYNAMIC TABLES LIKE \'t\' IN SCHEMA "DB"."s"')
+        self.assertFalse(client.is_dynamic_table_unchanged(*args, '30 minutes', 'WH'))
+        self.assertFalse(client.is_dynamic_table_unchanged(*args, '1 hour', 'OTHER_WH'))
+        self.assertFalse(client.is_dynamic_table_unchanged('DB', 's', 't', '"id" AS "ID"', args[4], '1 hour', 'WH'))
+
+        client.execute_query.return_value = []
+        self.assertFalse(client.is_dynamic_table_unchanged(*args, '1 hour', 'WH'))
+
+    def test_warehouse_free_summary_reports_resume_only_for_suspended_auto_resume_warehouse(self):
+        cases = [
+            ({'name': 'WH', 'state': 'SUSPENDED', 'auto_resume': 'true', 'auto_suspend': 600}, 0,
+             'one resume of the suspended warehouse WH was avoided, saving ~600s'),
+            ({'name': 'WH', 'state': 'SUSPENDED', 'auto_resume': 'true', 'auto_suspend': 30}, 0, 'saving ~60s'),
+            ({'name': 'WH', 'state': 'STARTED', 'auto_resume': 'true', 'auto_suspend': 600}, 0,
+             'no warehouse resume was avoided, warehouse WH was STARTED'),
+            ({'name': 'WH', 'state': 'SUSPENDED', 'auto_resume': 'false', 'auto_suspend': 600}, 0,
+             'no warehouse resume was avoided, warehouse WH was SUSPENDED with auto-resume false'),
+            ({'name': 'WH', 'state': 'SUSPENDED', 'auto_resume': 'true', 'auto_suspend': 600}, 1,
+             'no warehouse resume was avoided, the statements requiring compute'),
+            (None, 0, 'not visible to the role'),
+        ]
+        for row, compute_statements, expected in cases:
+            with self.subTest(row=row, compute_statements=compute_statements):
+                client = SnowflakeClient()
+                client.warehouse_free_sessions = 1
+                client.compute_statements = compute_statements
+                client.execute_query = mock.Mock(return_value=[{'name': 'WH_OTHER'}] + ([row] if row else []))
+
+                client.read_warehouse_state('wh')
+                client.read_warehouse_state('wh')
+                with self.assertLogs(level='INFO') as logs:
+                    client.log_warehouse_free_summary()
+
+                client.execute_query.assert_called_once_with("SHOW WAREHOUSES LIKE 'wh'")
+                self.assertIn(expected, logs.output[-1])
+
+    def test_dynamic_table_warehouse_is_quoted(self):
+        client = SnowflakeClient()
+        client.execute_query = mock.Mock()
+
+        client.create_or_replace_dynamic_table('"DB"."s"."t"', '"id" AS "id"', '"KEBOOLA_1"."in.c-a"."t"',
+                                               '1 hour', 'my_wh')
+
+        self.assertIn('WAREHOUSE = "my_wh" AS SELECT', client.execute_query.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+
+import mock
+from snowflake.connector.errors import ProgrammingError
+
+from checkpoint import RunCheckpoint
+from configuration import MaterializationRule
+from dbstorage.snowflake_client import Credentials
+from name_filter import NameFilter
+from scheduler import RunScheduler
+from view_creator import ViewCreator, StorageDataType
+
+
+def _view_creator() -> ViewCreator:
+    return ViewCreator(Credentials(account='acc', user='user', warehouse='WH'), 'https://connection.keboola.com',
+                       'token', '123')
+
+
+class TestViewCreator(unittest.TestCase):
+
+    def test_materialization_rule_selects_ddl(self):
+        view_creator = _view_creator()
+        view_creator._snowflake_client = mock.Mock()
+        view_creator._snowflake_client.is_dynamic_table_unchanged.return_value = False
+        view_creator._snowflake_client.is_materialized_view_unchanged.return_value = False
+        rules = [MaterializationRule('in.c-a.orders', 'dynamic_table', '15 minutes'),
+                 MaterializationRule('in.c-a.*', 'materialized_view')]
+        bucket_detail = {'id': 'in.c-a'}
+        columns = {'id': StorageDataType('STRING')}
+
+        for table_name in ['orders', 'customers']:
+            table = {'id': f'in.c-a.{table_name}', 'name': table_name}
+            view_creator._create_view_in_external_db(
+                bucket_detail, 'in_a', table, {}, columns, 'DB',
+                materialization_rule=view_creator._get_materialization_rule(table['id'], rules))
+        view_creator._create_view_in_external_db(bucket_detail, 'in_b', {'id': 'in.c-b.t', 'name': 't'}, {},
+                                                 columns, 'DB')
+
+        client = view_creator._snowflake_client
+        client.create_or_replace_dynamic_table.assert_called_once_with(
+            '"DB"."in_a"."orders"', mock.ANY, '"KEBOOLA_123"."in.c-a"."orders"', '15 minutes', 'WH', True)
+        client.create_or_replace_materialized_view.assert_called_once_with(
+            '"DB"."in_a"."customers"', mock.ANY, '"KEBOOLA_123"."in.c-a"."customers"', True)
+        client.create_or_replace_view.assert_called_once()
+
+    def test_existing_object_of_different_kind_is_replaced(self):
+        view_creator = _view_creator()
+        client = view_creator._snowflake_client = mock.Mock()
+        client.is_dynamic_table_unchanged.return_value = False
+        client.create_or_replace_dynamic_table.side_effect = [ProgrammingError('already exists'), None]
+        client.get_object_kind.return_value = 'VIEW'
+        table = {'id': 'in.c-a.orders', 'name': 'orders'}
+
+        view_creator._create_view_in_external_db({'id': 'in.c-a'}, 'in_a', table, {},
+                                                 {'id': StorageDataType('STRING')}, 'DB',
+                                                 materialization_rule=MaterializationRule('*', 'dynamic_table'))
+
+        client.get_object_kind.assert_called_once_with('DB', 'in_a', 'orders')
+        client.drop_object.assert_called_once_with('VIEW', '"DB"."in_a"."orders"')
+        self.assertEqual(2, client.create_or_replace_dynamic_table.call_count)
+
+    def test_unchanged_dynamic_table_is_not_replaced(self):
+        view_creator = _view_creator()
+        client = view_creator._snowflake_client = mock.Mock()
+        client.is_dynamic_table_unchanged.return_value = True
+        table = {'id': 'in.c-a.orders', 'name': 'orders'}
+
+        view_creator._create_view_in_external_db({'id': 'in.c-a'}, 'in_a', table, {},
+                                                 {'id': StorageDataType('STRING')}, 'DB',
+                                                 materialization_rule=MaterializationRule('*', 'dynamic_table',
+                                                                                          '15 minutes'))
+
+        client.is_dynamic_table_unchanged.assert_called_once_with(
+            'DB', 'in_a', 'orders', '"id"::STRING AS "id", "_timestamp"::TIMESTAMP AS "_timestamp"',
+            '"KEBOOLA_123"."in.c-a"."orders"', '15 minutes', 'WH')
+        client.create_or_replace_dynamic_table.assert_not_called()
+        self.assertEqual({('DB', 'in.c-a.orders'): '"DB"."in_a"."orders"'}, view_creator._created_views)
+
+    def test_existing_table_is_not_dropped(self):
+        view_creator = _view_creator()
+        client = view_creator._snowflake_client = mock.Mock()
+        client.create_or_replace_view.side_effect = ProgrammingError('already exists')
+        client.get_object_kind.return_value = 'TABLE'
+
+        with self.assertRaises(ProgrammingError):
+            view_creator._create_view_in_external_db({'id': 'in.c-a'}, 'in_a', {'id': 'in.c-a.t', 'name': 't'}, {},
+                                                     {'id': StorageDataType('STRING')}, 'DB')
+        client.drop_object.assert_not_called()
+
+    def test_filtered_out_tables_and_columns_are_skipped(self):
+        view_creator = _view_creator()
+        client = view_creator._snowflake_client = mock.MagicMock()
+        view_creator._bucket_details['in.c-a'] = {'id': 'in.c-a', 'stage': 'in', 'displayName': 'a'}
+        view_creator._bucket_tables['in.c-a'] = [
+            {'id': 'in.c-a.orders', 'name': 'orders', 'isAlias': False, 'columns': ['id', '_hash'],
+             'columnMetadata': []},
+            {'id': 'in.c-a.hashes', 'name': 'hashes', 'isAlias': False, 'columns': ['_hash'], 'columnMetadata': []},
+        ]
+
+        processed = view_creator.create_views_from_bucket('in.c-a', 'DB', column_filter=NameFilter(exclude=['_*']))
+
+        self.assertEqual(1, processed)
+        client.create_or_replace_view.assert_called_once_with('"DB"."in_a"."orders"',
+                                                              'NULLIF("id", \'\')::TEXT AS "id", "_timestamp"::TIMESTAMP AS '
+                                                              '"_timestamp"', '"KEBOOLA_123"."in.c-a"."orders"', True)
+
+        client.reset_mock()
+        processed = view_creator.create_views_from_bucket('in.c-a', 'DB', table_filter=NameFilter(['in.c-b.*']))
+
+        self.assertEqual(0, processed)
+        client.create_if_not_exist_schema.assert_not_called()
+        client.connect.assert_not_called()
+
+    def test_deadline_stops_bucket_after_processed_tables(self):
+        view_creator = _view_creator()
+        client = view_creator._snowflake_client = mock.MagicMock()
+        view_creator._bucket_details['in.c-a'] = {'id': 'in.c-a', 'stage': 'in', 'displayName': 'a'}
+        view_creator._bucket_tables['in.c-a'] = [
+            {'id': f'in.c-a.t{i}', 'name': f't{i}', 'isAlias': False, 'columns': ['id'], 'columnMetadata': []}
+            for i in range(3)]
+        checkpoint = RunCheckpoint({}, 'plan', lambda state: None)
+        scheduler = mock.Mock(spec=RunScheduler)
+        scheduler.can_start.return_value = True
+        scheduler.can_start_view.side_effect = [True, False]
+
+        processed = view_creator.create_views_from_bucket('in.c-a', 'DB', checkpoint=checkpoint, scheduler=scheduler)
+
+        self.assertEqual(1, processed)
+        client.create_or_replace_view.assert_called_once()
+        scheduler.can_start.assert_called_once_with('DB', 'in.c-a', 3)
+        scheduler.record.assert_called_once_with(mock.ANY, 1)
+        self.assertTrue(checkpoint.is_table_done('DB', 'in.c-a.t0'))
+        self.assertFalse(checkpoint.is_table_done('DB', 'in.c-a.t1'))
+
+
+if __name__ == "__main__":
+    unittest.main()